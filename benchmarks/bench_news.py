@@ -0,0 +1,74 @@
+"""Замер aggregate_news на тысячах новостей.
+
+    python benchmarks/bench_news.py [--feeds 12] [--items 500] [--duplicates 0.3]
+
+Генерирует фиды со случайными заголовками, часть из которых повторяется
+в других фидах с небольшими правками, и печатает время, число историй
+и сколько дубликатов склеилось.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+
+ASSETS = ["Bitcoin", "Ethereum", "Solana", "XRP", "Cardano", "Dogecoin", "BNB", "Toncoin"]
+SUBJECTS = ["price", "ETF inflows", "network fees", "open interest", "whale wallets", "staking yield", "hashrate"]
+VERBS = ["jumps", "drops", "stalls", "rebounds", "hits record", "slides", "doubles", "halves"]
+TAILS = ["after Fed decision", "amid liquidations", "as traders rotate", "ahead of halving",
+         "despite SEC delay", "on exchange outflows", "in Asian session", "as miners sell"]
+
+def headline(rng):
+    return f"{rng.choice(ASSETS)} {rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.randint(1, 99)}% {rng.choice(TAILS)}"
+
+def synthetic_feeds(feeds, items, duplicates, seed=1):
+    rng = random.Random(seed)
+    now = time.time()
+    results = {}
+    pool = []
+    expected = 0
+    for f in range(feeds):
+        entries = []
+        for i in range(items):
+            if pool and rng.random() < duplicates:
+                title = rng.choice(pool) + rng.choice(["", " - report", " again"])
+                expected += 1
+            else:
+                title = headline(rng)
+                pool.append(title)
+            entries.append({
+                "title": title,
+                "link": f"https://feed{f}.example/{i}",
+                "description": "",
+                "published": now - rng.randint(0, 48 * 3600),
+            })
+        results[f"https://feed{f}.example/rss"] = entries
+    return results, expected
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время aggregate_news")
+    parser.add_argument("--feeds", type=int, default=12)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--duplicates", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results, expected = synthetic_feeds(args.feeds, args.items, args.duplicates)
+    total = sum(len(items) for items in results.values())
+    best = float("inf")
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        stories = bot.aggregate_news(results)
+        best = min(best, time.perf_counter() - started)
+    merged = total - len(stories)
+    print(f"{total} items → {len(stories)} stories in {best:.3f}s ({total / best:,.0f} items/s)")
+    print(f"merged {merged} items, {expected} generated as duplicates")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
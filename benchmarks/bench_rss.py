@@ -0,0 +1,87 @@
+"""Замер разбора RSS: прежний ET.fromstring против потокового iter_feed_items.
+
+    python benchmarks/bench_rss.py [feed.xml ...] [--items 20000]
+
+Без файлов генерирует синтетический фид на --items элементов. Оба разбора
+читают фид с диска: старый целиком, новый кусками по RSS_CHUNK.
+Печатает время и пик памяти (tracemalloc) для каждого.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+
+def synthetic_feed(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel><title>bench</title>\n')
+        for i in range(count):
+            f.write(
+                f"<item><title>Bitcoin headline number {i}</title>"
+                f"<link>https://example.com/news/{i}</link>"
+                f"<description>{escape('Market update ' * 20)}{i}</description>"
+                f"<pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate></item>\n"
+            )
+        f.write("</channel></rss>\n")
+
+def parse_old(path):
+    """Разбор как до потокового парсера: весь ответ в памяти и полное дерево"""
+    with open(path, "rb") as f:
+        root = ET.fromstring(f.read())
+    items = []
+    for item in root.findall(".//item"):
+        title_elem = item.find("title")
+        link_elem = item.find("link")
+        description_elem = item.find("description")
+        items.append({
+            "title": title_elem.text.strip() if title_elem is not None and title_elem.text else "No title",
+            "link": link_elem.text.strip() if link_elem is not None and link_elem.text else "",
+            "description": description_elem.text.strip() if description_elem is not None and description_elem.text else "",
+        })
+    return len(items)
+
+def parse_stream(path):
+    def chunks():
+        with open(path, "rb") as f:
+            while chunk := f.read(bot.RSS_CHUNK):
+                yield chunk
+    return sum(1 for _ in bot.iter_feed_items(chunks()))
+
+def measure(func, path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = func(path)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, seconds, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ET.fromstring против iter_feed_items")
+    parser.add_argument("feeds", nargs="*", help="сохранённые фиды; без них — синтетический")
+    parser.add_argument("--items", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    feeds = args.feeds
+    if not feeds:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-rss-"), "feed.xml")
+        synthetic_feed(path, args.items)
+        feeds = [path]
+
+    for path in feeds:
+        print(f"📄 {path}: {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+        for name, func in (("fromstring", parse_old), ("stream", parse_stream)):
+            count, seconds, peak = measure(func, path)
+            print(f"   {name:10} {count:6} items  {seconds:7.3f}s  peak {peak / 1024 / 1024:7.2f} MiB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Замер анализа настроений: сколько текстов в секунду проходит score_texts.
+
+    python benchmarks/bench_sentiment.py [--texts 100000] [--repeat 3]
+
+Тексты собираются из заголовков и твитов со случайными словами; кэш
+весов токенов сбрасывается перед каждым прогоном.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+
+WORDS = [
+    "Bitcoin", "ETH", "Solana", "price", "surges", "crash", "not", "bank", "ETF", "approved",
+    "inflows", "outflows", "liquidations", "рынок", "обвал", "рост", "hackathon", "record",
+    "whales", "buy", "dip", "bearish", "bullish", "market", "today", "$70K", "fees",
+]
+
+def texts(count, seed=1):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 40))) for _ in range(count)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пропускная способность score_texts")
+    parser.add_argument("--texts", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    batch = texts(args.texts)
+    best = float("inf")
+    for _ in range(args.repeat):
+        bot._token_weights.clear()
+        started = time.perf_counter()
+        bot.score_texts(batch)
+        best = min(best, time.perf_counter() - started)
+    print(f"{args.texts} texts in {best:.3f}s ({args.texts / best:,.0f} texts/s)")
+
+    tracker = bot.SentimentTracker()
+    started = time.perf_counter()
+    tracker.observe(batch)
+    seconds = time.perf_counter() - started
+    print(f"SentimentTracker.observe: {args.texts / seconds:,.0f} texts/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
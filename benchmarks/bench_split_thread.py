@@ -0,0 +1,48 @@
+"""Замер split_thread на длинных текстах.
+
+    python benchmarks/bench_split_thread.py [--sizes 10000,100000,1000000] [--repeat 5]
+
+Печатает лучшее время и пропускную способность (символов в секунду);
+время должно расти линейно с длиной текста.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+
+WORDS = ["Bitcoin", "рынок", "ликвидность", "比特币", "🚀", "https://example.com/news/123", "ETF", "волатильность"]
+
+def long_text(size, seed=1):
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS) + rng.choice(["", "", ".", ",", "!", "\n"])
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пропускная способность split_thread")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for size in map(int, args.sizes.split(",")):
+        text = long_text(size)
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            parts = bot.split_thread(text)
+            best = min(best, time.perf_counter() - started)
+        print(f"{size:>9} chars  {len(parts):>6} parts  {best:8.4f}s  {size / best / 1e6:6.2f} M chars/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
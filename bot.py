@@ -1,54 +1,39 @@
 import os
+import io
 import time
+import signal
+import asyncio
 import random
 import json
-import schedule
-import tweepy
-import google.generativeai as genai
-import requests
+import re
+import hashlib
+import bisect
+import heapq
+import sys
+import sqlite3
+import struct
+import zlib
+import imghdr
+from collections import deque, OrderedDict, Counter
+from contextlib import contextmanager, nullcontext
+from functools import cached_property, lru_cache, partial
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
+from datetime import datetime
 from dotenv import load_dotenv
-from threading import Thread
+from threading import Thread, Lock, Event, BoundedSemaphore, get_ident
+from concurrent.futures import ThreadPoolExecutor, Future
 
 load_dotenv()
 
-# === Twitter API ===
-client = tweepy.Client(
-    consumer_key=os.getenv("API_KEY"),
-    consumer_secret=os.getenv("API_SECRET"),
-    access_token=os.getenv("ACCESS_TOKEN"),
-    access_token_secret=os.getenv("ACCESS_TOKEN_SECRET"),
-    wait_on_rate_limit=True
-)
-
-# 🔒 Защита от 401 Unauthorized
-try:
-    me = client.get_me()
-    if not me or not me.data:
-        raise Exception("Не удалось получить данные аккаунта. Проверь ключи и разрешения в X Developer Portal.")
-    bot_id = me.data.id
-    print(f"🤖 Bot ID: {bot_id}")
-except Exception as e:
-    print(f"❌ Ошибка авторизации: {e}")
-    exit(1)
-
 # === Gemini AI ===
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-use_gemini = bool(gemini_api_key)
-
-if use_gemini:
-    genai.configure(api_key=gemini_api_key)
-    gemini_model = genai.GenerativeModel(
-        "gemini-1.5-flash",
-        safety_settings={k: "BLOCK_NONE" for k in [
-            "HARM_CATEGORY_HARASSMENT",
-            "HARM_CATEGORY_HATE_SPEECH",
-            "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-            "HARM_CATEGORY_DANGEROUS_CONTENT"
-        ]}
-    )
-    print("✅ Gemini AI включён")
-else:
-    print("⚠️ GEMINI_API_KEY не задан")
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+GEMINI_SAFETY_CATEGORIES = [
+    "HARM_CATEGORY_HARASSMENT",
+    "HARM_CATEGORY_HATE_SPEECH",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+    "HARM_CATEGORY_DANGEROUS_CONTENT"
+]
 
 # === RSS FEEDS (только рабочие) ===
 RSS_FEEDS = [
@@ -68,77 +53,1713 @@ RSS_FEEDS = [
 MEDIA_ACCOUNTS = ["coindesk", "cointelegraph", "decrypt", "bitcoinmagazine", "blockworks", "bingx_official"]
 PEOPLE_ACCOUNTS = ["VitalikButerin", "cz_binance", "saylor", "RaoulGMI", "lindaxie", "cobie", "peter_szilagyi", "hasufl", "LynAldenContact", "CryptoRand"]
 
-processed_mentions = set()
-processed_trusted_tweets = set()
+# ======================
+# МЕТРИКИ
+# ======================
+
+METRICS_PORT = os.getenv("METRICS_PORT")            # включает /metrics
+METRICS_LOG = os.getenv("METRICS_LOG")              # путь для JSON-lines
+PROFILE_SLOW_SECONDS = float(os.getenv("PROFILE_SLOW_SECONDS", 0))  # 0 — профайлер выключен
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = 0.01
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+class Metrics:
+    """Счётчики и гистограммы задержек в формате Prometheus.
+
+    Когда метрики выключены, span() отдаёт готовый пустой контекст,
+    а inc()/observe() сразу выходят, так что горячий путь почти не платит.
+    """
+
+    def __init__(self, enabled=False, log_path=None):
+        self.enabled = enabled or bool(log_path)
+        self.log_path = log_path
+        self.lock = Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.null_span = nullcontext()
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # счётчики по корзинам, затем сумма и количество
+                histogram = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+
+    def span(self, name, **labels):
+        if not self.enabled:
+            return self.null_span
+        return self._span(name, labels)
+
+    @contextmanager
+    def _span(self, name, labels):
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            self.inc("errors", span=name, **labels)
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            self.observe(name, seconds, **labels)
+            if self.log_path:
+                self._log({"ts": time.time(), "span": name, "seconds": round(seconds, 6), "error": error, **labels})
+
+    def _log(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render(self):
+        """Текст для Prometheus"""
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, list(value)) for key, value in self.histograms.items())
+        family = None
+        for (name, labels), value in counters:
+            if name != family:
+                family = name
+                lines.append(f"# TYPE bot_{name}_total counter")
+            lines.append(f"bot_{name}_total{self._labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            if name != family:
+                family = name
+                lines.append(f"# TYPE bot_{name}_seconds histogram")
+            for bound, count in zip(LATENCY_BUCKETS, histogram):
+                lines.append(f"bot_{name}_seconds_bucket{self._labels(labels, [('le', bound)])} {count}")
+            lines.append(f"bot_{name}_seconds_bucket{self._labels(labels, [('le', '+Inf')])} {histogram[-1]}")
+            lines.append(f"bot_{name}_seconds_sum{self._labels(labels)} {histogram[-2]:.6f}")
+            lines.append(f"bot_{name}_seconds_count{self._labels(labels)} {histogram[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", int(port)), Handler)
+        Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        print(f"📈 Метрики: http://127.0.0.1:{port}/metrics")
+        return server
+
+metrics = Metrics(enabled=bool(METRICS_PORT), log_path=METRICS_LOG)
+
+@contextmanager
+def profile_if_slow(name, threshold=None):
+    """Сэмплирует стек текущего потока; если задача шла дольше порога,
+    сохраняет свёрнутые стеки (формат flamegraph.pl / speedscope)"""
+    threshold = PROFILE_SLOW_SECONDS if threshold is None else threshold
+    if not threshold:
+        yield
+        return
+    thread_id = get_ident()
+    samples = Counter()
+    done = Event()
+
+    def sample():
+        while not done.wait(PROFILE_INTERVAL):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                samples[";".join(reversed(stack))] += 1
+
+    sampler = Thread(target=sample, name=f"profile-{name}", daemon=True)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield
+    finally:
+        done.set()
+        sampler.join()
+        seconds = time.perf_counter() - started
+        if seconds >= threshold and samples:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{name}-{int(time.time())}.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            print(f"🐢 {name} шёл {seconds:.1f} с, профиль: {path}")
+
+# ======================
+# ХРАНИЛИЩЕ ОБРАБОТАННОГО
+# ======================
+
+STATE_DB = os.getenv("STATE_DB", "bot_state.db")
+SEEN_TTL = 30 * 24 * 3600       # через месяц записи забываются
+
+class SeenStore:
+    """Дедупликация упоминаний и новостей между перезапусками (SQLite, WAL)"""
+
+    def __init__(self, path=STATE_DB, ttl=SEEN_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = Lock()
+
+    @cached_property
+    def db(self):
+        # База открывается при первом обращении, а не при импорте
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, ts REAL NOT NULL,"
+            " PRIMARY KEY (kind, key)) WITHOUT ROWID"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS seen_ts ON seen (ts)")
+        db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)")
+        db.execute("DELETE FROM seen WHERE ts < ?", (time.time() - self.ttl,))
+        return db
+
+    def seen(self, kind, key):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT 1 FROM seen WHERE kind = ? AND key = ?", (kind, str(key))
+            ).fetchone()
+        return row is not None
+
+    def add(self, kind, key):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO seen (kind, key, ts) VALUES (?, ?, ?)",
+                (kind, str(key), time.time()),
+            )
+
+    def evict(self):
+        with self.lock:
+            self.db.execute("DELETE FROM seen WHERE ts < ?", (time.time() - self.ttl,))
+
+    def get_value(self, key, default=None):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_value(self, key, value):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, str(value)))
+
+seen_store = SeenStore()
+
+# ======================
+# ОЧЕРЕДЬ ДЕЙСТВИЙ С УЧЁТОМ ЛИМИТОВ X API
+# ======================
+
+RATE_LIMIT_WINDOWS = ("x-rate-limit", "x-app-limit-24hour", "x-user-limit-24hour")
+
+class RateLimits:
+    """Бюджет вызовов X API по каждому эндпоинту.
+
+    Остаток берётся из заголовков x-rate-limit-* (и суточных x-*-limit-24hour-*)
+    и до следующего ответа уменьшается на каждый вызов, как ведро токенов,
+    которое пополняется в момент reset.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.limits = {}
+
+    @staticmethod
+    def endpoint(method, url):
+        path = re.sub(r"(?<=.)/\d+(?=/|$)", "/:id", urlparse(url).path)
+        return f"{method} {path}"
+
+    def record(self, response, *args, **kwargs):
+        endpoint = self.endpoint(response.request.method, response.url)
+        metrics.observe("x_api", response.elapsed.total_seconds(), endpoint=endpoint)
+        if response.status_code >= 400:
+            metrics.inc("errors", span="x_api", endpoint=endpoint, status=response.status_code)
+        windows = {}
+        for prefix in RATE_LIMIT_WINDOWS:
+            remaining = response.headers.get(f"{prefix}-remaining")
+            reset = response.headers.get(f"{prefix}-reset")
+            if remaining is not None and reset is not None:
+                windows[prefix] = [int(remaining), int(reset)]
+        if windows:
+            with self.lock:
+                self.limits.setdefault(endpoint, {}).update(windows)
+
+    def wait_time(self, endpoint):
+        """Сколько секунд ждать до следующего вызова эндпоинта"""
+        now = time.time()
+        with self.lock:
+            windows = list(self.limits.get(endpoint, {}).values())
+        return max([reset - now for remaining, reset in windows if remaining <= 0 and reset > now] or [0])
+
+    def take(self, endpoint):
+        """Списывает один вызов из всех ещё не сброшенных окон"""
+        now = time.time()
+        with self.lock:
+            for window in self.limits.get(endpoint, {}).values():
+                if window[1] > now:
+                    window[0] -= 1
+
+LIKE_ENDPOINT = "POST /2/users/:id/likes"
+TWEET_ENDPOINT = "POST /2/tweets"
+
+class ActionQueue:
+    """Лайки и ответы уходят по очереди, с паузой, когда лимит исчерпан"""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.actions = deque()
+
+    def put(self, endpoint, action, description):
+        self.actions.append((endpoint, action, description))
+
+    def drain(self):
+        while self.actions:
+            endpoint, action, description = self.actions.popleft()
+            # endpoint=None — действие само следит за лимитом (например, через outbox)
+            if endpoint:
+                delay = self.limits.wait_time(endpoint)
+                if delay:
+                    print(f"⏳ Лимит {endpoint} исчерпан, ждём {delay:.0f} с")
+                    metrics.inc("rate_limit_waits", endpoint=endpoint)
+                    metrics.inc("rate_limit_wait_seconds", delay, endpoint=endpoint)
+                    time.sleep(delay)
+                self.limits.take(endpoint)
+            try:
+                action()
+            except Exception as e:
+                print(f"⚠️ {description} error: {e}")
+
+# ======================
+# КЭШ ОТВЕТОВ GEMINI
+# ======================
+
+LLM_CACHE_TTL = 24 * 3600
+LLM_CACHE_SIZE = 500
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", 2))   # одновременных вызовов на все аккаунты
+
+class LLMCache:
+    """Кэш ответов модели на диске по хэшу промпта.
+
+    Одинаковые запросы, пришедшие одновременно, склеиваются в один вызов.
+    """
+
+    def __init__(self, model, model_name, path=STATE_DB, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_SIZE,
+                 concurrency=GEMINI_CONCURRENCY):
+        self.model = model
+        self.model_name = model_name
+        self.slots = BoundedSemaphore(concurrency)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = Lock()
+        self.inflight = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "calls": 0, "call_seconds": 0.0}
+        self.path = path
+
+    @cached_property
+    def db(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, text TEXT NOT NULL,"
+            " created REAL NOT NULL, used REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS llm_cache_used ON llm_cache (used)")
+        return db
+
+    def key(self, prompt):
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        now = time.time()
+        row = self.db.execute(
+            "SELECT text FROM llm_cache WHERE key = ? AND created >= ?", (key, now - self.ttl)
+        ).fetchone()
+        if row:
+            self.db.execute("UPDATE llm_cache SET used = ? WHERE key = ?", (now, key))
+            return row[0]
+        return None
+
+    def _store(self, key, text):
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, text, created, used) VALUES (?, ?, ?, ?)",
+            (key, text, now, now),
+        )
+        self.db.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,))
+        self.db.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            " SELECT key FROM llm_cache ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def generate(self, prompt):
+        """Текст ответа модели; ошибки модели пробрасываются вызывающему"""
+        key = self.key(prompt)
+        with self.lock:
+            text = self._lookup(key)
+            if text is not None:
+                self.stats["hits"] += 1
+                metrics.inc("cache", cache="llm", result="hit")
+                return text
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                self.stats["misses"] += 1
+                future = self.inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+            metrics.inc("cache", cache="llm", result="miss" if owner else "coalesced")
+        if not owner:
+            return future.result()
+
+        started = time.perf_counter()
+        try:
+            with self.slots, metrics.span("gemini_call", model=self.model_name):
+                text = self.model.generate_content(prompt).text
+        except Exception as e:
+            with self.lock:
+                self.stats["errors"] += 1
+                del self.inflight[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            self.stats["calls"] += 1
+            self.stats["call_seconds"] += time.perf_counter() - started
+            self._store(key, text)
+            del self.inflight[key]
+        future.set_result(text)
+        return text
+
+    def summary(self):
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        stats["avg_call_seconds"] = stats["call_seconds"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+# ======================
+# КОНТЕКСТ БОТА
+# ======================
+
+class GeminiContext:
+    """Одна модель Gemini и один кэш ответов на все аккаунты"""
+
+    def __init__(self, env=None, store=None):
+        env = os.environ if env is None else env
+        self.api_key = env.get("GEMINI_API_KEY")
+        self.store = store or seen_store
+
+    @property
+    def use_gemini(self):
+        return bool(self.api_key)
+
+    @cached_property
+    def model(self):
+        if not self.use_gemini:
+            return None
+        import google.generativeai as genai
+        genai.configure(api_key=self.api_key)
+        return genai.GenerativeModel(
+            GEMINI_MODEL_NAME,
+            safety_settings={k: "BLOCK_NONE" for k in GEMINI_SAFETY_CATEGORIES}
+        )
+
+    @cached_property
+    def llm(self):
+        if not self.use_gemini:
+            return None
+        return LLMCache(self.model, GEMINI_MODEL_NAME, path=self.store.path)
+
+    def log_stats(self):
+        if "llm" not in self.__dict__ or self.llm is None:
+            return
+        stats = self.llm.summary()
+        print(
+            f"🧠 Gemini cache: hit rate {stats['hit_rate']:.0%}, hits {stats['hits']},"
+            f" coalesced {stats['coalesced']}, calls {stats['calls']}"
+            f" (avg {stats['avg_call_seconds']:.1f}s), errors {stats['errors']}"
+        )
+
+gemini = GeminiContext()
+
+ACCOUNTS_FILE = os.getenv("ACCOUNTS_FILE", "accounts.json")
+DEFAULT_ACCOUNT = "main"
+DEFAULT_LANGUAGE = "русский"
+
+class BotContext:
+    """Аккаунт X: клиент, лимиты и очередь действий, создаются при первом обращении.
+
+    Импорт модуля не ходит в сеть и не требует ключей, поэтому его можно
+    подключать из тестов и замеров. Ключи читаются из переменных окружения
+    с префиксом env_prefix (для основного аккаунта — без префикса).
+    """
+
+    def __init__(self, name=DEFAULT_ACCOUNT, env_prefix="", env=None, store=None, jobs=None,
+                 language=DEFAULT_LANGUAGE, persona=None):
+        env = os.environ if env is None else env
+        self.name = name
+        self.api_key = env.get(f"{env_prefix}API_KEY")
+        self.api_secret = env.get(f"{env_prefix}API_SECRET")
+        self.access_token = env.get(f"{env_prefix}ACCESS_TOKEN")
+        self.access_token_secret = env.get(f"{env_prefix}ACCESS_TOKEN_SECRET")
+        self.store = store or seen_store
+        self.jobs = jobs or {"analysis": True, "terms": True, "mentions": True}
+        self.language = language
+        self.persona = persona
+        self.rate_limits = RateLimits()
+        self.actions = ActionQueue(self.rate_limits)
+
+    def voice(self):
+        """Строки промпта с языком и образом аккаунта.
+
+        Попадают в промпт, а значит и в ключ кэша Gemini: у аккаунтов с
+        разным образом и тексты разные, а не одна цепочка слово в слово.
+        """
+        lines = [f"Язык текста: {self.language}."]
+        if self.persona:
+            lines.append(f"Образ автора и стиль: {self.persona}")
+        return "\n".join(lines)
+
+    def key(self, name):
+        """Ключ состояния аккаунта; у основного — без префикса, как раньше"""
+        return name if self.name == DEFAULT_ACCOUNT else f"{self.name}:{name}"
+
+    @cached_property
+    def client(self):
+        import tweepy
+        client = tweepy.Client(
+            consumer_key=self.api_key,
+            consumer_secret=self.api_secret,
+            access_token=self.access_token,
+            access_token_secret=self.access_token_secret,
+            wait_on_rate_limit=True
+        )
+        client.session.hooks["response"].append(self.rate_limits.record)
+        return client
+
+    @cached_property
+    def api(self):
+        # Загрузка медиа есть только в API v1.1
+        import tweepy
+        auth = tweepy.OAuth1UserHandler(
+            self.api_key, self.api_secret, self.access_token, self.access_token_secret
+        )
+        api = tweepy.API(auth, wait_on_rate_limit=True)
+        api.session.hooks["response"].append(self.rate_limits.record)
+        return api
+
+    @cached_property
+    def bot_id(self):
+        # ID аккаунта кэшируется на диске, чтобы не дёргать get_me при каждом старте
+        token = hashlib.sha256((self.access_token or "").encode("utf-8")).hexdigest()[:16]
+        key = f"bot_id:{token}"
+        cached = self.store.get_value(key)
+        if cached:
+            return int(cached)
+        me = self.client.get_me()
+        if not me or not me.data:
+            raise Exception("Не удалось получить данные аккаунта. Проверь ключи и разрешения в X Developer Portal.")
+        self.store.set_value(key, me.data.id)
+        return me.data.id
+
+ctx = BotContext()
+accounts = {ctx.name: ctx}
+
+def load_accounts(path=ACCOUNTS_FILE):
+    """Аккаунты из файла вида
+    [{"name": "ru", "env_prefix": "RU_", "language": "русский", "persona": "...", "jobs": {...}}].
+
+    Без файла работает один основной аккаунт с ключами без префикса. Два
+    аккаунта с одинаковыми языком и образом публиковали бы одинаковые
+    посты, что запрещают правила X, поэтому такой файл не принимается.
+    """
+    if not os.path.exists(path):
+        return accounts
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    loaded = {}
+    for entry in config:
+        name = entry["name"]
+        if name == ctx.name and not entry.get("env_prefix"):
+            account = ctx
+        else:
+            account = BotContext(name, entry.get("env_prefix", ""))
+        account.jobs.update(entry.get("jobs", {}))
+        account.language = entry.get("language", account.language)
+        account.persona = entry.get("persona", account.persona)
+        loaded[name] = account
+    voices = {}
+    for account in loaded.values():
+        if not (account.jobs.get("analysis") or account.jobs.get("terms")):
+            continue
+        other = voices.setdefault(account.voice(), account.name)
+        if other != account.name:
+            raise ValueError(f"У аккаунтов {other} и {account.name} одинаковые language/persona — посты совпадут")
+    accounts.clear()
+    accounts.update(loaded)
+    return accounts
+
+# ======================
+# ЖУРНАЛ ИСХОДЯЩИХ ТВИТОВ
+# ======================
+
+OUTBOX_RETRIES = 3              # попыток на твит за один проход
+OUTBOX_MAX_ATTEMPTS = 10        # после стольких попыток цепочка бросается
+OUTBOX_RESUME_EVERY = 15 * 60
+
+class Outbox:
+    """Очередь исходящих твитов с журналом на диске.
+
+    Цепочка записывается целиком до отправки, а ID каждого твита
+    фиксируется сразу после ответа API. После падения цепочка
+    продолжается с последнего подтверждённого твита, а повторная
+    постановка с тем же ключом не создаёт дублей.
+    """
+
+    def __init__(self, account_lookup, path=STATE_DB):
+        self.account_lookup = account_lookup
+        self.path = path
+        self.lock = Lock()
+        self.active = set()
+
+    @cached_property
+    def db(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " key TEXT NOT NULL, seq INTEGER NOT NULL, text TEXT NOT NULL,"
+            " reply_to TEXT, tweet_id TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " created REAL NOT NULL, account TEXT NOT NULL DEFAULT 'main', media_ids TEXT, marks TEXT,"
+            " PRIMARY KEY (key, seq))"
+        )
+        for column in ("account TEXT NOT NULL DEFAULT 'main'", "media_ids TEXT", "marks TEXT"):
+            try:
+                db.execute(f"ALTER TABLE outbox ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                pass  # колонка уже есть
+        return db
+
+    @staticmethod
+    def thread_key(account, parts, in_reply_to_tweet_id=None):
+        payload = "\0".join([account, str(in_reply_to_tweet_id or "")] + list(parts))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def publish(self, account, parts, in_reply_to_tweet_id=None, key=None, media_ids=None, marks=None):
+        """Ставит цепочку аккаунта в журнал и отправляет; возвращает ID всех твитов.
+
+        media_ids прикрепляются к первому твиту цепочки. marks — пары
+        (kind, key) для seen_store: они пишутся в журнал вместе с цепочкой
+        и отмечаются, как только первый твит подтверждён, в том числе при
+        дописывании после падения.
+        """
+        key = account.key(key) if key else self.thread_key(account.name, parts, in_reply_to_tweet_id)
+        media = ",".join(map(str, media_ids)) if media_ids else None
+        marks = json.dumps([list(mark) for mark in marks]) if marks else None
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO outbox (key, seq, text, reply_to, created, account, media_ids, marks)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (key, seq, text, str(in_reply_to_tweet_id) if seq == 0 and in_reply_to_tweet_id else None,
+                     now, account.name, media if seq == 0 else None, marks if seq == 0 else None)
+                    for seq, text in enumerate(parts)
+                ],
+            )
+        return self.send(key)
+
+    def send(self, key):
+        with self.lock:
+            if key in self.active:
+                raise RuntimeError(f"Цепочка {key[:8]} уже отправляется")
+            self.active.add(key)
+            rows = self.db.execute(
+                "SELECT seq, text, reply_to, tweet_id, attempts, account, media_ids, marks"
+                " FROM outbox WHERE key = ? ORDER BY seq",
+                (key,),
+            ).fetchall()
+        try:
+            ids = []
+            previous = rows[0][2] if rows else None
+            for seq, text, _, tweet_id, attempts, account, media, marks in rows:
+                if tweet_id is None:
+                    if attempts >= OUTBOX_MAX_ATTEMPTS:
+                        raise RuntimeError(f"Цепочка {key[:8]} брошена после {attempts} попыток")
+                    media_ids = media.split(",") if media else None
+                    tweet_id = self._send_one(self.account_lookup(account), key, seq, text, previous, media_ids)
+                if marks:
+                    store = self.account_lookup(account).store
+                    for kind, value in json.loads(marks):
+                        store.add(kind, value)
+                ids.append(tweet_id)
+                previous = tweet_id
+            return ids
+        finally:
+            with self.lock:
+                self.active.discard(key)
+
+    def _send_one(self, account, key, seq, text, reply_to, media_ids=None):
+        for attempt in range(OUTBOX_RETRIES):
+            delay = account.rate_limits.wait_time(TWEET_ENDPOINT)
+            if delay:
+                print(f"⏳ Лимит {TWEET_ENDPOINT} исчерпан, ждём {delay:.0f} с")
+                metrics.inc("rate_limit_waits", endpoint=TWEET_ENDPOINT)
+                metrics.inc("rate_limit_wait_seconds", delay, endpoint=TWEET_ENDPOINT)
+                time.sleep(delay)
+            account.rate_limits.take(TWEET_ENDPOINT)
+            with self.lock:
+                self.db.execute("UPDATE outbox SET attempts = attempts + 1 WHERE key = ? AND seq = ?", (key, seq))
+            try:
+                tweet = account.client.create_tweet(text=text, in_reply_to_tweet_id=reply_to, media_ids=media_ids)
+            except Exception as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                # 4xx (дубль, запрет, удалённый твит) повтором не исправить, кроме 429
+                permanent = status is not None and 400 <= status < 500 and status != 429
+                if permanent:
+                    # resume такую цепочку больше не подхватывает
+                    with self.lock:
+                        self.db.execute(
+                            "UPDATE outbox SET attempts = ? WHERE key = ? AND seq = ?",
+                            (OUTBOX_MAX_ATTEMPTS, key, seq),
+                        )
+                    raise
+                if attempt + 1 == OUTBOX_RETRIES:
+                    raise
+                print(f"⚠️ Tweet send error, retrying: {e}")
+                time.sleep(2 ** attempt)
+                continue
+            tweet_id = str(tweet.data["id"])
+            with self.lock:
+                self.db.execute("UPDATE outbox SET tweet_id = ? WHERE key = ? AND seq = ?", (tweet_id, key, seq))
+            return tweet_id
+
+    def pending(self):
+        with self.lock:
+            return [row[0] for row in self.db.execute(
+                "SELECT DISTINCT key FROM outbox WHERE tweet_id IS NULL AND attempts < ? AND account IN (%s)"
+                % ",".join("?" * len(accounts)),
+                (OUTBOX_MAX_ATTEMPTS, *accounts),
+            )]
+
+    def resume(self):
+        """Дописывает цепочки, оборванные падением или ошибками"""
+        with self.lock:
+            self.db.execute("DELETE FROM outbox WHERE created < ?", (time.time() - SEEN_TTL,))
+        for key in self.pending():
+            if key in self.active:
+                continue
+            try:
+                ids = self.send(key)
+                print(f"🔁 Цепочка {key[:8]} дописана, твитов: {len(ids)}")
+            except Exception as e:
+                print(f"⚠️ Outbox resume error: {e}")
+
+outbox = Outbox(lambda name: accounts[name])
+
+# === HTTP ===
+# Одна сессия с пулом соединений на все фиды
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+@lru_cache(maxsize=None)
+def get_http():
+    import requests
+    http = requests.Session()
+    http.headers.update(HTTP_HEADERS)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=len(RSS_FEEDS), pool_maxsize=len(RSS_FEEDS))
+    http.mount("https://", adapter)
+    return http
+
+RSS_TIMEOUT = 15
+RSS_WORKERS = 8
+FEED_FAIL_THRESHOLD = 3         # столько ошибок подряд — и фид выключается
+FEED_COOLDOWN = 30 * 60         # на столько секунд
+
+# Состояние фидов: ETag/Last-Modified, последний разбор и circuit breaker
+feed_state = {}
+feed_state_lock = Lock()
 
 # ======================
 # ПАРСИНГ RSS
 # ======================
 
-def parse_rss_feed(url):
+def _feed(url):
+    with feed_state_lock:
+        return feed_state.setdefault(url, {
+            "etag": None,
+            "last_modified": None,
+            "items": [],
+            "complete": False,
+            "failures": 0,
+            "skip_until": 0,
+        })
+
+def _feed_failed(state):
+    with feed_state_lock:
+        state["failures"] += 1
+        if state["failures"] >= FEED_FAIL_THRESHOLD:
+            state["skip_until"] = time.time() + FEED_COOLDOWN
+
+RSS_CHUNK = 16 * 1024
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+def parse_date(text):
+    """pubDate (RFC 822) или published/updated (ISO 8601) → unix time"""
+    try:
+        return parsedate_to_datetime(text).timestamp()
+    except (TypeError, ValueError, IndexError):
+        pass
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        from xml.etree import ElementTree as ET
-        root = ET.fromstring(response.content)
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+def _item_from_element(elem):
+    """Достаёт title/link/description/published из <item> (RSS) или <entry> (Atom)"""
+    title = link = description = published = None
+    for child in elem:
+        name = _local(child.tag)
+        text = child.text.strip() if child.text else ""
+        if name == "title" and title is None:
+            title = text
+        elif name == "link" and link is None:
+            # В Atom ссылка лежит в атрибуте href
+            if child.get("href") and child.get("rel", "alternate") == "alternate":
+                link = child.get("href").strip()
+            elif text:
+                link = text
+        elif name in ("description", "summary") and not description:
+            description = text
+        elif name == "content" and not description:
+            description = text
+        elif name in ("pubDate", "published", "updated", "date") and published is None and text:
+            published = parse_date(text)
+    return {
+        "title": title or "No title",
+        "link": link or "https://cointelegraph.com",
+        "description": description or "",
+        "published": published,
+    }
+
+def iter_feed_items(chunks):
+    """Потоково разбирает RSS/Atom из итератора байтовых кусков.
+
+    Элементы отдаются по мере появления и сразу удаляются из дерева,
+    поэтому память не растёт вместе с размером фида.
+    """
+    from xml.etree import ElementTree as ET
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if _local(elem.tag) in ("item", "entry"):
+                yield _item_from_element(elem)
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+    parser.close()
+
+def parse_rss_feed(url, limit=None, seen=None):
+    """Возвращает свежие новости фида.
+
+    limit — сколько элементов нужно вызывающему; seen(link) — разбор
+    останавливается на первой уже известной ссылке.
+    """
+    state = _feed(url)
+    if state["skip_until"] > time.time():
+        print(f"⏸️ Feed {url} skipped until cooldown ends")
+        metrics.inc("feed_skipped", feed=urlparse(url).netloc)
+        return []
+    try:
+        headers = {}
+        # Неполный прошлый разбор не годится, если нужно больше элементов
+        cached_enough = state["complete"] or (limit is not None and len(state["items"]) >= limit)
+        if cached_enough:
+            if state["etag"]:
+                headers["If-None-Match"] = state["etag"]
+            if state["last_modified"]:
+                headers["If-Modified-Since"] = state["last_modified"]
         items = []
-        for item in root.findall(".//item"):
-            title_elem = item.find("title")
-            link_elem = item.find("link")
-            description_elem = item.find("description")
-            title = title_elem.text.strip() if title_elem is not None and title_elem.text else "No title"
-            link = link_elem.text.strip() if link_elem is not None and link_elem.text else "https://cointelegraph.com"
-            description = description_elem.text.strip() if description_elem is not None and description_elem.text else ""
-            items.append({"title": title, "link": link, "description": description})
+        complete = True
+        with metrics.span("rss_fetch", feed=urlparse(url).netloc), \
+                get_http().get(url, headers=headers, timeout=RSS_TIMEOUT, stream=True) as response:
+            not_modified = response.status_code == 304
+            metrics.inc("cache", cache="rss", result="not_modified" if not_modified else "miss")
+            if not_modified:
+                # Фид не изменился — отдаём прошлый разбор без парсинга
+                for item in state["items"]:
+                    if (limit is not None and len(items) >= limit) or (seen and seen(item["link"])):
+                        break
+                    items.append(item)
+            else:
+                response.raise_for_status()
+                for item in iter_feed_items(response.iter_content(RSS_CHUNK)):
+                    if limit is not None and len(items) >= limit:
+                        complete = False
+                        break
+                    # Всё, что ниже известной ссылки, уже видели: такой префикс
+                    # годится для 304, поэтому разбор считается полным
+                    if seen and seen(item["link"]):
+                        break
+                    items.append(item)
+        with feed_state_lock:
+            state["failures"] = 0
+            state["skip_until"] = 0
+            if not not_modified:
+                state["etag"] = response.headers.get("ETag")
+                state["last_modified"] = response.headers.get("Last-Modified")
+                state["items"] = items
+                state["complete"] = complete
         return items
     except Exception as e:
         print(f"⚠️ RSS parse error for {url}: {e}")
+        _feed_failed(state)
         return []
 
-def get_latest_crypto_news():
-    print("🔍 Trying to get news...")
-    random.shuffle(RSS_FEEDS)
-    for url in RSS_FEEDS:
-        print(f"📡 Parsing {url}...")
-        items = parse_rss_feed(url)
-        if items:
-            print(f"✅ Got news: {items[0]['title']}")
-            return items[0]["title"], items[0]["link"], items[0]["description"]
+def fetch_all_feeds(urls=None, limit=None, seen=None):
+    """Параллельно опрашивает фиды, возвращает {url: items}"""
+    urls = list(urls or RSS_FEEDS)
+    with ThreadPoolExecutor(max_workers=min(RSS_WORKERS, len(urls)), thread_name_prefix="rss") as pool:
+        results = pool.map(lambda url: parse_rss_feed(url, limit=limit, seen=seen), urls)
+        return dict(zip(urls, results))
+
+def news_posted(account, link):
+    return seen_store.seen(account.key("news"), link)
+
+# ======================
+# АГРЕГАЦИЯ НОВОСТЕЙ
+# ======================
+
+NEWS_PER_FEED = 20
+NEWS_HALF_LIFE = 6 * 3600       # вес новости падает вдвое за 6 часов
+MINHASH_BANDS = 16
+MINHASH_ROWS = 2
+MINHASH_SIZE = MINHASH_BANDS * MINHASH_ROWS
+DUPLICATE_THRESHOLD = 0.6       # сходство Жаккара по парам слов, выше — одна и та же история
+MINHASH_FORMAT = struct.Struct(f">{MINHASH_SIZE}I")
+HEADLINE_STOPWORDS = {
+    "a", "an", "the", "to", "of", "in", "on", "for", "and", "or", "as", "at",
+    "by", "with", "is", "are", "be", "from", "after", "its", "it", "this", "that",
+}
+
+def headline_words(title):
+    return [w for w in re.findall(r"[\w$%]+", title.lower()) if w not in HEADLINE_STOPWORDS]
+
+def headline_shingles(title):
+    """Пары соседних слов заголовка: "price drops" и "price rises" уже не совпадут.
+
+    Края отмечены ^ и $, чтобы замена первого или последнего слова стоила
+    столько же, сколько замена слова в середине.
+    """
+    # Обрезка до 5 букв — грубый стемминг: surge/surges/surged совпадут
+    words = ["^"] + [w[:5] for w in headline_words(title)] + ["$"]
+    return {f"{a} {b}" for a, b in zip(words, words[1:])} if len(words) > 2 else set()
+
+def headline_assets(title):
+    words = set(headline_words(title))
+    return frozenset(asset for asset, keywords in ASSET_KEYWORDS.items() if keywords & words)
+
+def shingle_hashes(shingle):
+    """MINHASH_SIZE независимых 32-битных хэшей; не зависят от PYTHONHASHSEED, как и подписи"""
+    return MINHASH_FORMAT.unpack(hashlib.shake_128(shingle.encode("utf-8")).digest(MINHASH_FORMAT.size))
+
+def minhash(shingles):
+    if not shingles:
+        return None
+    return tuple(map(min, zip(*map(shingle_hashes, shingles))))
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+def headline_tone(title):
+    """Слова заголовка и знак его настроения — для проверки, что склеиваемое не противоречит"""
+    [(score, _)] = score_texts([title])
+    return set(headline_words(title)), _sign(score)
+
+def tones_conflict(a, b):
+    """approves/rejects, inflows/outflows: слова, которыми заголовки различаются, тянут в разные стороны"""
+    (a_words, a_sign), (b_words, b_sign) = a, b
+    if a_sign * b_sign < 0:
+        return True
+    a_diff = sum(map(token_weight, a_words - b_words))
+    b_diff = sum(map(token_weight, b_words - a_words))
+    return _sign(a_diff) != _sign(b_diff)
+
+def aggregate_news(results, now=None):
+    """Сливает новости всех фидов в истории и ранжирует их.
+
+    Элементы идут по времени (куча по pubDate), похожие заголовки из разных
+    фидов склеиваются: MinHash + LSH находит кандидатов, точное сходство
+    пар слов решает. Истории про разные активы или с противоположным
+    настроением не склеиваются никогда. Вес истории растёт с числом фидов,
+    которые её дали, и падает с возрастом.
+    """
+    now = now or time.time()
+    streams = []
+    for feed_url, items in results.items():
+        dated = [((-(item["published"] or 0)), feed_url, item) for item in items]
+        dated.sort(key=lambda entry: entry[0])
+        streams.append(dated)
+
+    stories = []
+    buckets = {}
+    for _, feed_url, item in heapq.merge(*streams, key=lambda entry: entry[0]):
+        shingles = headline_shingles(item["title"])
+        signature = minhash(shingles)
+        assets = headline_assets(item["title"])
+        tone = None
+        story = None
+        if signature:
+            keys = [(band, signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]) for band in range(MINHASH_BANDS)]
+            candidates = {id(s): s for key in keys for s in buckets.get(key, ())}
+            best = 0
+            for candidate in candidates.values():
+                if candidate["assets"] != assets:
+                    continue
+                similarity = jaccard(shingles, candidate["shingles"])
+                if similarity < DUPLICATE_THRESHOLD or similarity <= best:
+                    continue
+                tone = tone or headline_tone(item["title"])
+                if not tones_conflict(tone, candidate["tone"]):
+                    story, best = candidate, similarity
+        if story is None:
+            story = {
+                "title": item["title"],
+                "link": item["link"],
+                "description": item["description"],
+                "published": item["published"],
+                "shingles": shingles,
+                "assets": assets,
+                "tone": tone or headline_tone(item["title"]),
+                "links": [],
+                "sources": set(),
+            }
+            stories.append(story)
+            if signature:
+                for key in keys:
+                    buckets.setdefault(key, []).append(story)
+        story["links"].append(item["link"])
+        story["sources"].add(feed_url)
+        # Из дубликатов берём самое подробное описание
+        if len(item["description"]) > len(story["description"]):
+            story["description"] = item["description"]
+
+    for story in stories:
+        age = now - story["published"] if story["published"] else NEWS_HALF_LIFE
+        story["score"] = len(story["sources"]) * 0.5 ** (max(age, 0) / NEWS_HALF_LIFE)
+    stories.sort(key=lambda story: story["score"], reverse=True)
+    return stories
+
+FALLBACK_STORY = {
+    "title": "Stay updated on crypto markets",
+    "link": "https://cointelegraph.com",
+    "description": "Comprehensive analysis of current cryptocurrency market trends and developments.",
+    "links": [],
+    "sources": set(),
+    "score": 0,
+}
+
+NEWS_SHARE_TTL = 5 * 60         # столько живёт общий опрос фидов
+
+shared_news = {"results": {}, "fetched": 0}
+shared_news_lock = Lock()
+
+def fetch_shared_news():
+    """Один опрос фидов на все аккаунты; одновременные вызовы ждут общий результат"""
+    with shared_news_lock:
+        if time.time() - shared_news["fetched"] < NEWS_SHARE_TTL:
+            return shared_news["results"]
+        # Разбор фида останавливается на новости, которую опубликовали все аккаунты
+        results = fetch_all_feeds(
+            RSS_FEEDS,
+            limit=NEWS_PER_FEED,
+            seen=lambda link: all(news_posted(account, link) for account in list(accounts.values())),
+        )
+        items = [item for feed_items in results.values() for item in feed_items]
+        sentiment_tracker.observe(
+            [f"{item['title']}. {item['description']}" for item in items],
+            keys=[item["link"] for item in items],
+        )
+        shared_news["results"] = results
+        shared_news["fetched"] = time.time()
+        return results
+
+def get_latest_crypto_news(account=None):
+    """Самая значимая история из всех фидов, ещё не опубликованная аккаунтом"""
+    account = account or ctx
+    print(f"🔍 [{account.name}] Trying to get news...")
+    # Уже опубликованные новости пропускаем
+    results = {
+        feed_url: [item for item in items if not news_posted(account, item["link"])]
+        for feed_url, items in fetch_shared_news().items()
+    }
+    stories = aggregate_news(results)
+    if stories:
+        story = stories[0]
+        print(f"✅ Got news from {len(story['sources'])} feed(s): {story['title']}")
+        return story
     print("❌ No news found, using fallback")
-    return "Stay updated on crypto markets", "https://cointelegraph.com", "Comprehensive analysis of current cryptocurrency market trends and developments."
+    return FALLBACK_STORY
 
 # ======================
-# ЗАГЛУШКА ДЛЯ АНАЛИЗА НАСТРОЕНИЙ
+# АНАЛИЗ НАСТРОЕНИЙ
 # ======================
 
+# Основы слов: совпадение по началу токена, вес от -1 до 1
+SENTIMENT_LEXICON = {
+    # bullish
+    "surg": 1, "soar": 1, "rall": 1, "gain": 0.6, "rise": 0.6, "rising": 0.6, "jump": 0.8,
+    "record": 0.6, "breakout": 0.8, "adopt": 0.6, "approv": 0.8, "inflow": 0.8,
+    "upgrad": 0.5, "partnership": 0.5, "recover": 0.6, "rebound": 0.7, "boost": 0.6,
+    "growth": 0.6, "outperform": 0.7, "moon": 0.8, "pump": 0.5,
+    "рост": 0.6, "раст": 0.6, "ралли": 1, "взлет": 1, "взлёт": 1, "бычь": 1, "бычий": 1,
+    "максимум": 0.6, "приток": 0.8, "одобр": 0.8, "восстанов": 0.6, "укрепл": 0.5,
+    # bearish
+    "crash": -1, "plung": -1, "drop": -0.7, "fall": -0.6, "dump": -0.8,
+    "exploit": -1, "lawsuit": -0.7,
+    "outflow": -0.8, "liquidat": -0.7, "selloff": -0.9, "sell-off": -0.9, "fear": -0.6,
+    "loss": -0.6, "declin": -0.6, "slump": -0.8, "fraud": -1, "scam": -1,
+    "tumbl": -0.8, "sink": -0.7, "warn": -0.4, "risk": -0.3, "bankrupt": -1,
+    "паден": -0.7, "пада": -0.7, "обвал": -1, "медвеж": -1, "взлом": -1, "запрет": -0.7,
+    "отток": -0.8, "ликвидац": -0.7, "убыт": -0.6, "мошен": -1, "снижен": -0.6, "страх": -0.6,
+}
+# Короткие основы как префикс ловят чужие слова (bank, hackathon, athens) — только целиком
+SENTIMENT_WORDS = {
+    **dict.fromkeys(("bull", "bulls", "bullish"), 1),
+    **dict.fromkeys(("ath", "aths"), 0.8),
+    **dict.fromkeys(("bear", "bears", "bearish"), -1),
+    **dict.fromkeys(("hack", "hacks", "hacked", "hacker", "hackers", "hacking"), -1),
+    **dict.fromkeys(("sue", "sues", "sued", "suing"), -0.6),
+    **dict.fromkeys(("ban", "bans", "banned", "banning"), -0.7),
+    **dict.fromkeys(("rug", "rugs", "rugged", "rugpull", "rug-pull"), -0.9),
+    "fell": -0.6,
+}
+SENTIMENT_NEGATIONS = {"not", "no", "never", "without", "не", "нет", "без"}
+SENTIMENT_STEM_LENGTHS = sorted({len(stem) for stem in SENTIMENT_LEXICON}, reverse=True)
+SENTIMENT_WINDOW = 200          # последних оценок на актив
+SENTIMENT_THRESHOLD = 0.15
+# Актив → слова, по которым текст к нему относится; MARKET — все тексты
+ASSET_KEYWORDS = {
+    "BTC": {"bitcoin", "btc", "биткоин", "биткойн"},
+    "ETH": {"ethereum", "eth", "ether", "эфир", "эфириум"},
+    "SOL": {"solana", "sol"},
+    "XRP": {"xrp", "ripple"},
+}
+
+_token_weights = {}
+
+def token_weight(token):
+    """Вес токена: слово целиком или самая длинная совпавшая основа; результат запоминается"""
+    weight = _token_weights.get(token)
+    if weight is None:
+        weight = SENTIMENT_WORDS.get(token, 0)
+        if not weight:
+            for length in SENTIMENT_STEM_LENGTHS:
+                if length <= len(token) and token[:length] in SENTIMENT_LEXICON:
+                    weight = SENTIMENT_LEXICON[token[:length]]
+                    break
+        if len(_token_weights) < 100_000:
+            _token_weights[token] = weight
+    return weight
+
+def score_texts(texts):
+    """Оценки от -1 до 1 и множества активов для пачки текстов за один проход"""
+    results = []
+    for text in texts:
+        tokens = re.findall(r"[\w-]+", text.lower())
+        total = hits = negated = 0
+        for token in tokens:
+            if token in SENTIMENT_NEGATIONS:
+                # Отрицание переворачивает ближайшее оценочное слово в пределах трёх
+                negated = 3
+                continue
+            weight = token_weight(token)
+            if weight:
+                if negated:
+                    weight, negated = -weight, 0
+                total += weight
+                hits += 1
+            elif negated:
+                negated -= 1
+        assets = {asset for asset, words in ASSET_KEYWORDS.items() if words.intersection(tokens)}
+        results.append((total / hits if hits else 0.0, assets))
+    return results
+
+class SentimentTracker:
+    """Скользящее настроение по активам: кольцевой буфер последних оценок"""
+
+    def __init__(self, window=SENTIMENT_WINDOW):
+        self.lock = Lock()
+        self.window = window
+        self.scores = {}
+        self.observed = OrderedDict()
+
+    def observe(self, texts, keys=None):
+        """Учитывает тексты; тексты с уже виденным ключом пропускаются"""
+        if keys is not None:
+            with self.lock:
+                fresh = [(text, key) for text, key in zip(texts, keys) if key not in self.observed]
+                for _, key in fresh:
+                    self.observed[key] = True
+                while len(self.observed) > self.window * 20:
+                    self.observed.popitem(last=False)
+            texts = [text for text, _ in fresh]
+        now = time.time()
+        scored = score_texts(texts)
+        with self.lock:
+            for score, assets in scored:
+                if not score:
+                    continue
+                for asset in assets | {"MARKET"}:
+                    buffer = self.scores.get(asset)
+                    if buffer is None:
+                        buffer = self.scores[asset] = deque(maxlen=self.window)
+                    buffer.append((now, score))
+
+    def aggregate(self, asset="MARKET", count=None):
+        """Среднее последних count оценок и их число"""
+        with self.lock:
+            buffer = list(self.scores.get(asset, ()))
+        if count:
+            buffer = buffer[-count:]
+        if not buffer:
+            return 0.0, 0
+        return sum(score for _, score in buffer) / len(buffer), len(buffer)
+
+    def summary(self, assets=("BTC", "ETH")):
+        parts = []
+        for asset in assets:
+            score, count = self.aggregate(asset)
+            if count:
+                parts.append(f"{asset} {sentiment_label(score).split()[-1]} {score:+.2f}")
+        return " | ".join(parts)
+
+def sentiment_label(score):
+    if score > SENTIMENT_THRESHOLD:
+        return "bullish 🟢"
+    if score < -SENTIMENT_THRESHOLD:
+        return "bearish 🔴"
+    return "neutral ⚪"
+
+sentiment_tracker = SentimentTracker()
+
 def analyze_sentiment(kw="#bitcoin", cnt=15):
-    return random.choice(["bullish 🟢", "bearish 🔴", "neutral ⚪"])
+    """Настроение по активу из kw ("#bitcoin", "eth") по последним cnt текстам"""
+    word = kw.lstrip("#$").lower()
+    asset = next((asset for asset, words in ASSET_KEYWORDS.items() if word in words), "MARKET")
+    score, _ = sentiment_tracker.aggregate(asset, cnt)
+    return sentiment_label(score)
+
+# ======================
+# ЦЕНЫ
+# ======================
+
+COINGECKO_URL = os.getenv("COINGECKO_URL", "https://api.coingecko.com/api/v3")
+BINGX_URL = os.getenv("BINGX_URL", "https://open-api.bingx.com")
+USE_BINGX_TICKERS = os.getenv("BINGX_TICKERS", "").lower() in ("1", "true", "yes")
+# id на CoinGecko : тикер
+PRICE_ASSETS = os.getenv("PRICE_ASSETS", "bitcoin:BTC,ethereum:ETH")
+PRICE_TIMEOUT = 5
+PRICE_TTL = 60                  # свежие цены
+PRICE_MAX_STALE = 15 * 60       # старше — уже не показываем
+
+def parse_assets(spec):
+    assets = {}
+    for pair in spec.split(","):
+        if pair.strip():
+            coin_id, _, symbol = pair.strip().partition(":")
+            assets[coin_id] = symbol or coin_id.upper()
+    return assets
+
+class PriceService:
+    """Цены всех активов одним запросом, с кэшем и обновлением в фоне.
+
+    Пока данные моложе ttl, они отдаются как есть; до max_stale отдаются
+    старые, а обновление уходит в фоновый поток.
+    """
+
+    def __init__(self, assets, coingecko_url=COINGECKO_URL, bingx_url=BINGX_URL,
+                 use_bingx=USE_BINGX_TICKERS, ttl=PRICE_TTL, max_stale=PRICE_MAX_STALE):
+        self.assets = assets
+        self.coingecko_url = coingecko_url.rstrip("/")
+        self.bingx_url = bingx_url.rstrip("/")
+        self.use_bingx = use_bingx
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.lock = Lock()
+        self.refreshing = False
+        self.quotes = {}
+        self.updated = 0
+
+    def _fetch_coingecko(self):
+        res = get_http().get(
+            f"{self.coingecko_url}/simple/price",
+            params={
+                "ids": ",".join(self.assets),
+                "vs_currencies": "usd",
+                "include_24hr_change": "true",
+            },
+            timeout=PRICE_TIMEOUT,
+        )
+        res.raise_for_status()
+        data = res.json()
+        quotes = {}
+        for coin_id, symbol in self.assets.items():
+            if coin_id in data and "usd" in data[coin_id]:
+                quotes[symbol] = {
+                    "usd": data[coin_id]["usd"],
+                    "change_24h": data[coin_id].get("usd_24h_change"),
+                }
+        return quotes
+
+    def _fetch_bingx(self, quotes):
+        res = get_http().get(f"{self.bingx_url}/openApi/spot/v1/ticker/24hr", timeout=PRICE_TIMEOUT)
+        res.raise_for_status()
+        wanted = {f"{symbol}-USDT": symbol for symbol in self.assets.values()}
+        for ticker in res.json().get("data") or []:
+            symbol = wanted.get(ticker.get("symbol"))
+            if symbol:
+                quotes.setdefault(symbol, {})["bingx"] = float(ticker["lastPrice"])
+
+    def refresh(self):
+        quotes = {}
+        try:
+            try:
+                quotes = self._fetch_coingecko()
+            except Exception as e:
+                print(f"⚠️ Price fetch error: {e}")
+            # BingX опрашивается и при сбое CoinGecko — тогда цены только из него
+            if self.use_bingx:
+                try:
+                    self._fetch_bingx(quotes)
+                except Exception as e:
+                    print(f"⚠️ BingX ticker error: {e}")
+            if quotes:
+                with self.lock:
+                    self.quotes = quotes
+                    self.updated = time.time()
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+    def warm(self):
+        """Обновляет несвежие цены в фоне; вызывается перед постом, пока идёт генерация"""
+        with self.lock:
+            if time.time() - self.updated < self.ttl or self.refreshing:
+                return
+            self.refreshing = True
+        Thread(target=self.refresh, name="prices", daemon=True).start()
+
+    def get(self):
+        """Словарь тикер → котировка; пустой, если цен нет"""
+        with self.lock:
+            age = time.time() - self.updated
+            if age < self.ttl:
+                return self.quotes
+            if age < self.max_stale:
+                if not self.refreshing:
+                    self.refreshing = True
+                    Thread(target=self.refresh, name="prices", daemon=True).start()
+                return self.quotes
+        self.refresh()
+        with self.lock:
+            if time.time() - self.updated >= self.max_stale:
+                return {}           # обновить не вышло, а старые цены показывать нельзя
+            return self.quotes
+
+    def summary(self):
+        quotes = self.get()
+        if not quotes:
+            return "Prices unavailable"
+        parts = []
+        for symbol, quote in quotes.items():
+            if "usd" in quote:
+                part = f"{symbol}: ${quote['usd']:,}"
+                if quote.get("change_24h") is not None:
+                    part += f" ({quote['change_24h']:+.1f}%)"
+                if "bingx" in quote:
+                    part += f", BingX ${quote['bingx']:,}"
+            elif "bingx" in quote:
+                part = f"{symbol}: ${quote['bingx']:,} (BingX)"
+            else:
+                continue
+            parts.append(part)
+        return " | ".join(parts)
+
+price_service = PriceService(parse_assets(PRICE_ASSETS))
+
+# ======================
+# МЕДИА
+# ======================
+
+CHART_IMAGES = os.getenv("CHART_IMAGES", "1").lower() in ("1", "true", "yes")
+CHART_DAYS = 1
+CHART_TTL = 15 * 60             # один график на все аккаунты в пределах окна
+CHART_WIDTH = 600
+CHART_HEIGHT = 300
+CHART_PADDING = 12
+MEDIA_MAX_BYTES = 5 * 1024 * 1024   # лимит X на картинку
+MEDIA_TYPES = {"png", "jpeg", "gif", "webp"}
+MEDIA_CHUNK = 64 * 1024
+
+def fetch_price_history(coin_id, days=CHART_DAYS):
+    res = get_http().get(
+        f"{price_service.coingecko_url}/coins/{coin_id}/market_chart",
+        params={"vs_currency": "usd", "days": days},
+        timeout=PRICE_TIMEOUT,
+    )
+    res.raise_for_status()
+    return [price for _, price in res.json().get("prices") or []]
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def render_chart(values, width=CHART_WIDTH, height=CHART_HEIGHT):
+    """Спарклайн цены в PNG с палитрой из трёх цветов, без сторонних библиотек"""
+    if len(values) < 2:
+        raise ValueError("Мало точек для графика")
+    low, high = min(values), max(values)
+    scale = (height - 2 * CHART_PADDING - 1) / ((high - low) or 1)
+    rising = values[-1] >= values[0]
+    palette = bytes((0x15, 0x19, 0x22)) + (
+        bytes((0x1f, 0x4d, 0x3a, 0x26, 0xd0, 0x7c)) if rising else bytes((0x4d, 0x1f, 0x25, 0xf2, 0x3d, 0x4f))
+    )
+    rows = [bytearray(width) for _ in range(height)]
+    last = len(values) - 1
+    previous = None
+    for x in range(width):
+        y = CHART_PADDING + round((high - values[x * last // (width - 1)]) * scale)
+        for row in rows[y + 1:]:
+            row[x] = 1          # заливка под линией
+        top, bottom = (y, y) if previous is None else (min(previous, y), max(previous, y))
+        for row in rows[top:bottom + 2]:
+            row[x] = 2          # линия толщиной 2 px
+        previous = y
+    raw = b"".join(b"\x00" + row for row in rows)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)),
+        _png_chunk(b"PLTE", palette),
+        _png_chunk(b"IDAT", zlib.compress(raw)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+@lru_cache(maxsize=2)
+def _chart_png(coin_id, window):
+    return render_chart(fetch_price_history(coin_id))
+
+def price_chart():
+    """PNG графика первого актива за сутки; общий для всех аккаунтов в пределах CHART_TTL"""
+    coin_id = next(iter(price_service.assets))
+    return _chart_png(coin_id, int(time.time() // CHART_TTL))
+
+def check_media(source, limit=MEDIA_MAX_BYTES):
+    """Тип и размер картинки; файл читается потоком и возвращается на место.
+
+    source — bytes/memoryview или открытый бинарный файл.
+    """
+    if not hasattr(source, "read"):
+        size = memoryview(source).nbytes
+        kind = imghdr.what(source)
+    else:
+        kind = imghdr.what(source)
+        start = source.tell()
+        size = 0
+        try:
+            while size <= limit:
+                chunk = source.read(MEDIA_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+        finally:
+            source.seek(start)
+    if kind not in MEDIA_TYPES:
+        raise ValueError(f"Неподдерживаемый тип картинки: {kind}")
+    if size > limit:
+        raise ValueError(f"Картинка больше {limit // (1024 * 1024)} МБ")
+    return kind, size
+
+def upload_media(account, source, filename="chart.png"):
+    """Загружает картинку от имени аккаунта; возвращает media_id"""
+    kind, size = check_media(source)
+    file = source if hasattr(source, "read") else io.BytesIO(source)
+    media = account.api.media_upload(filename=filename, file=file)
+    print(f"🖼️ [{account.name}] Картинка {kind} {size // 1024} КБ загружена (media_id: {media.media_id_string})")
+    return media.media_id_string
+
+def chart_media_ids(account):
+    """media_ids графика для первого твита; без графика пост уходит текстом"""
+    try:
+        return [upload_media(account, price_chart())]
+    except Exception as e:
+        print(f"⚠️ Chart error: {e}")
+        return None
 
 # ======================
 # ОСНОВНЫЕ ФУНКЦИИ
 # ======================
 
-def load_crypto_terms():
+TERMS_FILE = "crypto_terms.json"
+
+def load_crypto_terms(path=TERMS_FILE):
     try:
-        with open("crypto_terms.json", "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except:
         return [{"term": "Blockchain", "definition": "A decentralized ledger."}]
 
 def get_crypto_prices():
-    try:
-        res = requests.get("https://api.coingecko.com/api/v3/simple/price?ids=bitcoin,ethereum&vs_currencies=usd", timeout=5)
-        data = res.json()
-        return f"BTC: ${data['bitcoin']['usd']:,} | ETH: ${data['ethereum']['usd']:,}"
-    except:
-        return "BTC & ETH prices unavailable"
+    return price_service.summary()
+
+# ======================
+# СЛОВАРЬ ТЕРМИНОВ
+# ======================
+
+TERM_QUESTION = re.compile(
+    r"(?:what\s+(?:is|are|does)|what's|explain|что\s+такое|что\s+значит|объясни)\s+(?:an?\s+|the\s+)?([^?!.,\n]{2,40})",
+    re.IGNORECASE,
+)
+
+def normalize_term(text):
+    return " ".join(re.sub(r"[^\w%\s-]", " ", text.lower()).split())
+
+def term_aliases(term_data):
+    """Алиасы: "Proof-of-Work (PoW)" → proof-of-work (pow), proof-of-work, proof of work, pow"""
+    name = term_data["term"]
+    aliases = {normalize_term(name)}
+    base, _, short = name.partition("(")
+    aliases.add(normalize_term(base))
+    if short:
+        aliases.add(normalize_term(short.rstrip(")")))
+    for alias in term_data.get("aliases", []):
+        aliases.add(normalize_term(alias))
+    aliases |= {alias.replace("-", " ") for alias in aliases}
+    aliases.discard("")
+    return aliases
+
+class TermIndex:
+    """Словарь терминов в памяти: поиск по имени и алиасам и ротация без повторов.
+
+    Файл перечитывается только при смене mtime, позиция ротации хранится в
+    state, так что после перезапуска термины не начинают повторяться.
+    """
+
+    def __init__(self, path=TERMS_FILE, store=None):
+        self.path = path
+        self.store = store or seen_store
+        self.lock = Lock()
+        self.mtime = None
+        self.terms = []
+        self.by_alias = {}
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if self.terms and mtime == self.mtime:
+            return
+        self.mtime = mtime
+        self.terms = load_crypto_terms(self.path)
+        self.by_alias = {}
+        for i, term_data in enumerate(self.terms):
+            for alias in term_aliases(term_data):
+                self.by_alias.setdefault(alias, i)
+
+    def find(self, text):
+        with self.lock:
+            self._reload()
+            i = self.by_alias.get(normalize_term(text))
+            return self.terms[i] if i is not None else None
+
+    def find_question(self, text):
+        """Термин из вопроса вида "what is X" / "что такое X" или None"""
+        for match in TERM_QUESTION.finditer(text):
+            words = normalize_term(match.group(1)).split()
+            # Берём самый длинный префикс, который есть в словаре
+            for n in range(len(words), 0, -1):
+                term_data = self.find(" ".join(words[:n]))
+                if term_data:
+                    return term_data
+        return None
 
-def generate_long_analysis(title, url, description):
-    """Генерирует длинный аналитический пост с использованием Gemini AI"""
-    if not use_gemini:
+    def next_term(self, prefix=""):
+        """Следующий термин по кругу; каждый круг — новая перестановка.
+
+        prefix разделяет ротацию разных аккаунтов.
+        """
+        with self.lock:
+            self._reload()
+            names = [term_data["term"] for term_data in self.terms]
+            order = json.loads(self.store.get_value(f"{prefix}terms_order", "[]"))
+            cursor = int(self.store.get_value(f"{prefix}terms_cursor", 0))
+            if cursor >= len(order) or set(order) != set(names):
+                order = random.sample(names, len(names))
+                cursor = 0
+                self.store.set_value(f"{prefix}terms_order", json.dumps(order, ensure_ascii=False))
+            self.store.set_value(f"{prefix}terms_cursor", cursor + 1)
+            return self.terms[self.by_alias[normalize_term(order[cursor])]]
+
+term_index = TermIndex()
+
+# ======================
+# ЦЕПОЧКИ ТВИТОВ
+# ======================
+
+TWEET_LIMIT = 280
+URL_WEIGHT = 23                 # t.co считает любую ссылку за 23 символа
+URL_RE = re.compile(r"https?://\S+")
+SENTENCE_END_RE = re.compile(r"[.!?…](?=\s)|\n")
+SPACE_RE = re.compile(r"\s")
+
+def char_weight(code):
+    """Вес символа по правилам X: латиница и кириллица — 1, CJK и эмодзи — 2"""
+    if code <= 4351 or 8192 <= code <= 8205 or 8208 <= code <= 8223 or 8242 <= code <= 8247:
+        return 1
+    return 2
+
+def cumulative_weights(text):
+    """cum[i] — взвешенная длина text[:i]"""
+    url_ends = {m.start(): m.end() for m in URL_RE.finditer(text)}
+    cum = [0] * (len(text) + 1)
+    total = 0
+    after_joiner = False
+    i = 0
+    while i < len(text):
+        url_end = url_ends.get(i)
+        if url_end:
+            total += URL_WEIGHT
+            for j in range(i, url_end):
+                cum[j + 1] = total
+            i = url_end
+            after_joiner = False
+            continue
+        code = ord(text[i])
+        # ZWJ-последовательности, селекторы и тон кожи не добавляют длины
+        if after_joiner or code in (0x200D, 0xFE0E, 0xFE0F) or 0x1F3FB <= code <= 0x1F3FF:
+            weight = 0
+        else:
+            weight = char_weight(code)
+        after_joiner = code == 0x200D
+        total += weight
+        cum[i + 1] = total
+        i += 1
+    return cum
+
+def tweet_length(text):
+    return cumulative_weights(text)[-1]
+
+def _last_before(positions, low, high):
+    i = bisect.bisect_right(positions, high) - 1
+    if i >= 0 and positions[i] > low:
+        return positions[i]
+    return None
+
+def _split_parts(text, cum, budget, sentence_ends, spaces):
+    parts = []
+    start = 0
+    n = len(text)
+    while start < n:
+        while start < n and text[start].isspace():
+            start += 1
+        if start >= n:
+            break
+        limit = cum[start] + budget
+        max_end = bisect.bisect_right(cum, limit) - 1
+        if max_end >= n:
+            parts.append(text[start:].rstrip())
+            break
+        # Сначала конец предложения (если часть не выйдет слишком короткой), потом пробел
+        end = _last_before(sentence_ends, start, max_end)
+        if end is None or cum[end] - cum[start] < budget // 2:
+            end = _last_before(spaces, start, max_end) or end
+        if end is None:
+            end = max(max_end, start + 1)
+        part = text[start:end].rstrip()
+        if part:
+            parts.append(part)
+        start = end
+    return parts
+
+def split_thread(text, limit=TWEET_LIMIT):
+    """Режет текст на твиты по предложениям и словам и нумерует части "1/N"."""
+    text = text.strip()
+    cum = cumulative_weights(text)
+    if cum[-1] <= limit:
+        return [text]
+    sentence_ends = [m.end() for m in SENTENCE_END_RE.finditer(text)]
+    spaces = [m.start() for m in SPACE_RE.finditer(text)]
+    digits = 1
+    while True:
+        # Резерв под " 12/34"
+        parts = _split_parts(text, cum, limit - (2 * digits + 2), sentence_ends, spaces)
+        if len(str(len(parts))) <= digits:
+            break
+        digits += 1
+    total = len(parts)
+    return [f"{part} {i}/{total}" for i, part in enumerate(parts, 1)]
+
+def post_thread(parts, in_reply_to_tweet_id=None, key=None, account=None, media_ids=None, marks=None):
+    """Публикует части цепочкой через журнал, каждая — ответ на предыдущую; возвращает ID"""
+    return outbox.publish(account or ctx, parts, in_reply_to_tweet_id=in_reply_to_tweet_id, key=key,
+                          media_ids=media_ids, marks=marks)
+
+def generate_long_analysis(title, url, description, account=None):
+    """Генерирует длинный аналитический пост с использованием Gemini AI голосом аккаунта"""
+    account = account or ctx
+    if not gemini.use_gemini:
         # Заглушка для длинного поста без Gemini
         return f"""🤖 ИНТЕЛЛЕКТУАЛЬНЫЙ АНАЛИЗ РЫНКА КРИПТОВАЛЮТ
 
@@ -167,7 +1788,8 @@ def generate_long_analysis(title, url, description):
 
 #CryptoAnalysis #MarketInsights #TradingStrategy #Bitcoin #Ethereum"""
     
-    prompt = f"""Ты — профессиональный криптоаналитик с 10-летним опытом. Напиши подробный аналитический пост на русском языке (не менее 500 символов) по следующим критериям:
+    prompt = f"""Ты — профессиональный криптоаналитик с 10-летним опытом. Напиши подробный аналитический пост (не менее 500 символов) по следующим критериям:
+{account.voice()}
 
 ЗАГОЛОВОК: "{title}"
 ОПИСАНИЕ: "{description}"
@@ -186,8 +1808,7 @@ def generate_long_analysis(title, url, description):
 ВАЖНО: Пост должен быть информативным, а не маркетинговым. Не упоминай реферальные ссылки. Сфокусируйся на объективном анализе."""
     
     try:
-        res = gemini_model.generate_content(prompt)
-        analysis = res.text.strip().replace("\n\n", "\n")
+        analysis = gemini.llm.generate(prompt).strip().replace("\n\n", "\n")
         return analysis
     except Exception as e:
         print(f"❌ Ошибка генерации анализа: {e}")
@@ -220,42 +1841,34 @@ def generate_long_analysis(title, url, description):
 
 #CryptoAnalysis #MarketUpdate #Bitcoin #Ethereum #Trading"""
     
-def post_analytical_tweet():
+def publish_analysis(story, analysis, account=None):
+    """Публикует анализ цепочкой твитов и отмечает новость как опубликованную"""
+    account = account or ctx
+    header = f"🤖 АНАЛИТИЧЕСКИЙ ОТЧЕТ РЫНКА КРИПТОВАЛЮТ\n📊 {get_crypto_prices()}"
+    mood = sentiment_tracker.summary()
+    if mood:
+        header += f"\n🧭 Настроение: {mood}"
+    text = f"{header}\n\n{analysis}"
+    media_ids = chart_media_ids(account) if CHART_IMAGES else None
+    # Ссылки отмечаются журналом вместе с первым твитом — и после дописывания тоже
+    marks = [(account.key("news"), link) for link in story["links"]]
+    ids = post_thread(split_thread(text), account=account, media_ids=media_ids, marks=marks)
+    print(f"✅ [{account.name}] Основной твит опубликован (ID: {ids[0]})")
+    print(f"✅ Полный аналитический пост опубликован в виде цепочки из {len(ids)} твитов")
+
+def post_analytical_tweet(account=None):
     print("🔄 post_analytical_tweet() called")
     try:
-        title, url, description = get_latest_crypto_news()
-        analysis = generate_long_analysis(title, url, description)
-        
-        # Публикуем основной твит
-        tweet = f"🤖 АНАЛИТИЧЕСКИЙ ОТЧЕТ РЫНКА КРИПТОВАЛЮТ\n\n{analysis[:200]}..."
-        main_tweet = client.create_tweet(text=tweet)
-        print(f"✅ Основной твит опубликован (ID: {main_tweet.data['id']})")
-        
-        # Создаем цепочку из дополнительных твитов с подробным анализом
-        thread_tweets = [
-            analysis[200:500],
-            analysis[500:800],
-            analysis[800:]
-        ]
-        
-        current_tweet_id = main_tweet.data['id']
-        for i, thread_content in enumerate(thread_tweets):
-            if thread_content.strip():
-                thread_tweet = client.create_tweet(
-                    text=thread_content[:280] + "..." if len(thread_content) > 280 else thread_content,
-                    in_reply_to_tweet_id=current_tweet_id
-                )
-                current_tweet_id = thread_tweet.data['id']
-                print(f"✅ Дополнительный твит #{i+1} в цепочке опубликован")
-                time.sleep(2)  # Пауза между публикациями
-        
-        print("✅ Полный аналитический пост опубликован в виде цепочки")
+        story = get_latest_crypto_news(account)
+        analysis = generate_long_analysis(story["title"], story["link"], story["description"], account)
+        publish_analysis(story, analysis, account)
     except Exception as e:
         print(f"❌ Tweet error: {e}")
 
-def post_crypto_term():
-    terms = load_crypto_terms()
-    term_data = random.choice(terms)
+def post_crypto_term(account=None):
+    account = account or ctx
+    term_data = term_index.next_term(prefix=account.key(""))
+    price_service.warm()
     
     # Генерируем подробное объяснение термина с AI
     prompt = f"""Ты — эксперт по криптовалютам. Напиши подробное, но доступное объяснение термина "{term_data['term']}" для новичков. Включи:
@@ -265,46 +1878,71 @@ def post_crypto_term():
 4. Связанные концепции
 5. Почему это важно для трейдеров
 
-Объем: 3-4 абзаца. Тон: дружелюбный, но профессиональный."""
+Объем: 3-4 абзаца. Тон: дружелюбный, но профессиональный.
+{account.voice()}"""
     
     detailed_definition = term_data['definition']
-    if use_gemini:
+    if gemini.use_gemini:
         try:
-            res = gemini_model.generate_content(prompt)
-            detailed_definition = res.text.strip().replace("\n\n", "\n")
+            detailed_definition = gemini.llm.generate(prompt).strip().replace("\n\n", "\n")
         except:
             pass
     
-    tweet = f"📚 ГЛУБОКИЙ РАЗБОР ТЕРМИНА ДНЯ:\n\n**{term_data['term']}**\n\n{detailed_definition}\n\nЭтот термин критически важен для понимания работы крипторынка и формирования эффективных торговых стратегий."
+    tweet = f"📚 ГЛУБОКИЙ РАЗБОР ТЕРМИНА ДНЯ:\n\n**{term_data['term']}**\n\n{detailed_definition}\n\nЭтот термин критически важен для понимания работы крипторынка и формирования эффективных торговых стратегий.\n\n📊 {get_crypto_prices()}"
     
-    if len(tweet) > 280:
-        # Создаем цепочку для длинного поста о термине
-        first_part = tweet[:280]
-        second_part = tweet[280:]
-        
-        main_tweet = client.create_tweet(text=first_part)
-        client.create_tweet(text=second_part, in_reply_to_tweet_id=main_tweet.data['id'])
+    ids = post_thread(split_thread(tweet), account=account)
+    if len(ids) > 1:
         print("📖 Подробный разбор термина опубликован в виде цепочки")
     else:
-        client.create_tweet(text=tweet)
         print("📖 Подробный разбор термина опубликован")
 
-def engage_with_mentions():
-    global processed_mentions
+MENTIONS_PAGE_SIZE = 100
+MENTIONS_FIRST_RUN = 5          # без курсора отвечаем только на самые свежие, как раньше
+
+def fetch_new_mentions(account):
+    """Все упоминания аккаунта с прошлого опроса (по since_id) и карта author_id → username"""
+    import tweepy
+    since_id = seen_store.get_value(account.key("mentions_since_id"))
+    if since_id:
+        paging = {"since_id": since_id, "max_results": MENTIONS_PAGE_SIZE}
+    else:
+        # При первом запуске не выкачиваем всю историю
+        paging = {"max_results": MENTIONS_FIRST_RUN, "limit": 1}
+    pages = tweepy.Paginator(
+        account.client.get_users_mentions,
+        id=account.bot_id,
+        expansions=["author_id"],
+        user_fields=["username"],
+        **paging,
+    )
+    mentions, usernames, newest_id = [], {}, None
+    for page in pages:
+        if newest_id is None and page.meta:
+            newest_id = page.meta.get("newest_id")
+        for user in (page.includes or {}).get("users", []):
+            usernames[user.id] = user.username
+        mentions.extend(page.data or [])
+    return mentions, usernames, newest_id
+
+def engage_with_mentions(account=None):
+    account = account or ctx
     try:
-        mentions = client.get_users_mentions(id=bot_id, max_results=5)
-        if not mentions or not mentions.data:
-            return
-        for mention in reversed(mentions.data):
-            if mention.id in processed_mentions or mention.author_id == bot_id:
+        mentions, usernames, newest_id = fetch_new_mentions(account)
+        sentiment_tracker.observe([m.text for m in mentions], keys=[f"mention:{m.id}" for m in mentions])
+        # Старые упоминания — первыми
+        for mention in sorted(mentions, key=lambda m: m.id):
+            if mention.author_id == account.bot_id or seen_store.seen(account.key("mention"), mention.id):
                 continue
-            try:
-                client.like(mention.id)
-                author = client.get_user(id=mention.author_id)
-                
-                # Генерируем подробный ответ на упоминание
-                prompt = f"""Ты — профессиональный криптоаналитик. Пользователь @{author.data.username} упомянул тебя в твите: "{mention.text}"
+            username = usernames.get(mention.author_id, "user")
+            account.actions.put(LIKE_ENDPOINT, lambda m=mention: account.client.like(m.id), "Like")
+            term_data = term_index.find_question(mention.text)
+            term_hint = ""
+            if term_data:
+                term_hint = f"\nСправка из нашего словаря — {term_data['term']}: {term_data['definition']}\n"
 
+            # Генерируем подробный ответ на упоминание
+            prompt = f"""Ты — профессиональный криптоаналитик. Пользователь @{username} упомянул тебя в твите: "{mention.text}"
+{term_hint}
 Напиши развернутый, полезный ответ (не менее 150 символов), который:
 1. Конкретно отвечает на вопрос или комментарий пользователя
 2. Предоставляет ценную аналитическую информацию
@@ -312,41 +1950,262 @@ def engage_with_mentions():
 4. Сохраняет профессиональный тон, но дружелюбный
 5. Поощряет дальнейшее обсуждение
 
-ВАЖНО: Не используй реферальные ссылки. Не проси подписаться. Фокусируйся на качестве анализа."""
-                
-                reply_text = "Спасибо за упоминание! Рынок криптовалют демонстрирует интересную динамику на текущей неделе. Если у вас есть конкретные вопросы по стратегиям или анализу, пожалуйста, задавайте — я предоставлю развернутый ответ с профессиональной точки зрения."
-                
-                if use_gemini:
-                    try:
-                        res = gemini_model.generate_content(prompt)
-                        reply_text = res.text.strip().replace("\n\n", "\n")
-                    except:
-                        pass
-                
-                client.create_tweet(text=reply_text, in_reply_to_tweet_id=mention.id)
-                print(f"💬 Развернутый ответ отправлен @{author.data.username}")
-            except Exception as e:
-                print(f"⚠️ Reply error: {e}")
-            processed_mentions.add(mention.id)
+ВАЖНО: Не используй реферальные ссылки. Не проси подписаться. Фокусируйся на качестве анализа.
+{account.voice()}"""
+            
+            reply_text = "Спасибо за упоминание! Рынок криптовалют демонстрирует интересную динамику на текущей неделе. Если у вас есть конкретные вопросы по стратегиям или анализу, пожалуйста, задавайте — я предоставлю развернутый ответ с профессиональной точки зрения."
+            if term_data:
+                reply_text = f"📚 {term_data['term']}: {term_data['definition']}"
+            
+            if gemini.use_gemini:
+                try:
+                    reply_text = gemini.llm.generate(prompt).strip().replace("\n\n", "\n")
+                except:
+                    pass
+
+            def reply(m=mention, text=reply_text, username=username):
+                try:
+                    post_thread(split_thread(text), in_reply_to_tweet_id=m.id, key=f"reply:{m.id}", account=account)
+                    print(f"💬 [{account.name}] Развернутый ответ отправлен @{username}")
+                finally:
+                    seen_store.add(account.key("mention"), m.id)
+
+            account.actions.put(None, reply, "Reply")
+        account.actions.drain()
+        if newest_id:
+            seen_store.set_value(account.key("mentions_since_id"), newest_id)
     except Exception as e:
         print(f"❌ Mention error: {e}")
 
 # ======================
-# ЗАПУСК
+# РАНТАЙМ ЗАДАЧ
 # ======================
 
-if __name__ == "__main__":
-    print("🚀 Starting BingX Trading Bot (Full Edition with Long Posts)...")
-    print("🔄 Running first analytical post...")
-    post_analytical_tweet()
-    print("🔄 Setting up schedule...")
+JOB_JITTER = 60                 # случайный сдвиг запуска, секунд
+PIPELINE_QUEUE_SIZE = 2
+SHUTDOWN_TIMEOUT = 120
+
+class Job:
+    """Периодическая задача со своим потоком-исполнителем.
+
+    Если прошлый запуск ещё идёт, очередной пропускается.
+    """
+
+    def __init__(self, name, func, every=None, at=None, jitter=JOB_JITTER, run_at_start=False):
+        self.name = name
+        self.func = func
+        self.every = every
+        self.at = at
+        self.jitter = jitter
+        self.run_at_start = run_at_start
+        self.executor = None
+        self.running = None
+        self.tasks = set()
+
+    def next_delay(self):
+        if self.at:
+            hour, minute = map(int, self.at.split(":"))
+            now = time.localtime()
+            delay = (hour * 3600 + minute * 60) - (now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec)
+            if delay <= 0:
+                delay += 24 * 3600
+        else:
+            delay = self.every
+        return delay + random.uniform(0, self.jitter)
+
+    async def trigger(self):
+        if self.running and not self.running.done():
+            print(f"⏭️ {self.name}: прошлый запуск ещё идёт, пропускаем")
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        loop = asyncio.get_running_loop()
+        self.running = loop.run_in_executor(self.executor, self._run)
+        try:
+            await self.running
+        except Exception as e:
+            print(f"❌ {self.name} error: {e}")
+
+    def _run(self):
+        with metrics.span("job", job=self.name), profile_if_slow(self.name):
+            return self.func()
+
+    def _spawn(self):
+        # Сам запуск не ждём, чтобы не сбивать расписание
+        task = asyncio.create_task(self.trigger())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run(self, stop):
+        if self.run_at_start:
+            self._spawn()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.next_delay())
+            except asyncio.TimeoutError:
+                self._spawn()
+
+    async def shutdown(self):
+        if self.running and not self.running.done():
+            print(f"⏳ Ждём завершения {self.name}...")
+            await asyncio.wait([self.running], timeout=SHUTDOWN_TIMEOUT)
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
+class Pipeline:
+    """Цепочка стадий с ограниченными очередями между ними.
+
+    Каждая стадия работает в своём потоке, так что публикация прошлого
+    поста не мешает получать новости и генерировать следующий.
+    """
+
+    def __init__(self, name, stages, maxsize=PIPELINE_QUEUE_SIZE):
+        """stages — список (имя, функция, число потоков)"""
+        self.name = name
+        self.stages = stages
+        self.queues = [asyncio.Queue(maxsize=maxsize) for _ in stages]
+        self.executors = [
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-{stage_name}")
+            for stage_name, _, workers in stages
+        ]
+        self.workers = []
+
+    def submit(self, item=None):
+        try:
+            self.queues[0].put_nowait(item)
+        except asyncio.QueueFull:
+            print(f"⏭️ {self.name}: конвейер занят, пропускаем запуск")
+
+    async def _worker(self, index):
+        stage_name, func, _ = self.stages[index]
+        queue = self.queues[index]
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await queue.get()
+            try:
+                result = await loop.run_in_executor(self.executors[index], self._run_stage, stage_name, func, item)
+                if result is not None and index + 1 < len(self.stages):
+                    await self.queues[index + 1].put(result)
+            except Exception as e:
+                print(f"❌ {self.name}/{stage_name} error: {e}")
+            finally:
+                queue.task_done()
+
+    def _run_stage(self, stage_name, func, item):
+        name = f"{self.name}-{stage_name}"
+        with metrics.span("stage", pipeline=self.name, stage=stage_name), profile_if_slow(name):
+            return func(item)
+
+    def start(self):
+        self.workers = [
+            asyncio.create_task(self._worker(i))
+            for i, (_, _, workers) in enumerate(self.stages)
+            for _ in range(workers)
+        ]
+
+    async def shutdown(self):
+        # Доводим до конца то, что уже в конвейере
+        try:
+            for queue in self.queues:
+                await asyncio.wait_for(queue.join(), SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {self.name}: не дождались конвейера")
+        for worker in self.workers:
+            worker.cancel()
+        for executor in self.executors:
+            executor.shutdown(wait=False)
+
+class PipelineJob(Job):
+    """Периодически подаёт item на вход конвейера"""
+
+    def __init__(self, name, pipeline, item=None, every=None, jitter=JOB_JITTER, run_at_start=False):
+        super().__init__(name, None, every=every, jitter=jitter, run_at_start=run_at_start)
+        self.pipeline = pipeline
+        self.item = item
+
+    async def trigger(self):
+        self.pipeline.submit(self.item)
+
+    async def shutdown(self):
+        pass
+
+def analysis_pipeline(accounts_count=1):
+    """Новости → анализ Gemini → публикация цепочкой; один конвейер на все аккаунты"""
+    def fetch(account):
+        print(f"🔄 [{account.name}] post_analytical_tweet() called")
+        # Цены обновляются, пока Gemini пишет анализ, — пост их не ждёт
+        price_service.warm()
+        return account, get_latest_crypto_news(account)
+
+    def generate(post):
+        account, story = post
+        return account, story, generate_long_analysis(story["title"], story["link"], story["description"], account)
+
+    def publish(post):
+        account, story, analysis = post
+        publish_analysis(story, analysis, account)
+
+    stages = [("fetch", fetch, 1), ("generate", generate, GEMINI_CONCURRENCY), ("publish", publish, 1)]
+    return Pipeline("analysis", stages, maxsize=max(PIPELINE_QUEUE_SIZE, accounts_count))
+
+async def run_bot():
+    load_accounts()
+    # 🔒 Защита от 401 Unauthorized
+    for account in list(accounts.values()):
+        try:
+            print(f"🤖 [{account.name}] Bot ID: {account.bot_id}")
+        except Exception as e:
+            print(f"❌ [{account.name}] Ошибка авторизации: {e}")
+            del accounts[account.name]
+    if not accounts:
+        exit(1)
+    print("✅ Gemini AI включён" if gemini.use_gemini else "⚠️ GEMINI_API_KEY не задан")
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    pipeline = analysis_pipeline(len(accounts))
+    pipeline.start()
 
     # Оптимальное расписание без перегрузки API
-    schedule.every(6).hours.do(post_analytical_tweet)
-    schedule.every().day.at("10:00").do(post_crypto_term)
-    schedule.every(3).hours.do(lambda: print("🔄 Проверка упоминаний в режиме ожидания"))
-    schedule.every(90).minutes.do(engage_with_mentions)
+    jobs = []
+    for account in accounts.values():
+        if account.jobs.get("analysis"):
+            # Первый аналитический пост — сразу при запуске
+            jobs.append(PipelineJob(f"{account.name}:analysis", pipeline, account, every=6 * 3600, run_at_start=True))
+        if account.jobs.get("terms"):
+            jobs.append(Job(f"{account.name}:post_crypto_term", partial(post_crypto_term, account), at="10:00"))
+        if account.jobs.get("mentions"):
+            # Упоминания опрашиваются отдельно по каждому аккаунту
+            jobs.append(Job(f"{account.name}:engage_with_mentions", partial(engage_with_mentions, account), every=90 * 60))
+    jobs += [
+        Job("evict_seen", seen_store.evict, every=24 * 3600),
+        # Оборванные при падении цепочки дописываются сразу после старта
+        Job("outbox_resume", outbox.resume, every=OUTBOX_RESUME_EVERY, run_at_start=True),
+        Job("gemini_stats", gemini.log_stats, every=6 * 3600),
+    ]
+    tasks = [asyncio.create_task(job.run(stop)) for job in jobs]
 
-    while True:
-        schedule.run_pending()
-        time.sleep(30)
\ No newline at end of file
+    await stop.wait()
+    print("🛑 Останавливаемся...")
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await pipeline.shutdown()
+    for job in jobs:
+        await job.shutdown()
+    gemini.log_stats()
+    print("👋 Бот остановлен")
+
+# ======================
+# ЗАПУСК
+# ======================
+
+if __name__ == "__main__":
+    print("🚀 Starting BingX Trading Bot (Full Edition with Long Posts)...")
+    asyncio.run(run_bot())
@@ -1,86 +1,131 @@
 # imghdr.py — восстановленный модуль для Python 3.13+
-"""Guess the type of an image based on its first few bytes."""
+"""Guess the type of an image based on its first few bytes.
+
+Signatures live in one dispatch table keyed by the first byte, so a
+header is matched with a single dict lookup and a few prefix compares
+instead of running every test in turn.
+"""
+
+import os
 
 __all__ = ["what"]
 
-# Known formats
+HEADER_SIZE = 32
+
+# Extra user tests, called as test(h, f) after the table like in the stdlib
 tests = []
 
-def test_jpeg(h, f):
-    """JPEG data with JFIF or Exif markers"""
-    if h[6:10] in (b'JFIF', b'Exif'):
-        return 'jpeg'
-
-def test_png(h, f):
-    """PNG data"""
-    if h.startswith(b'\211PNG\r\n\032\n'):
-        return 'png'
-
-def test_gif(h, f):
-    """GIF data"""
-    if h[:6] in (b'GIF87a', b'GIF89a'):
-        return 'gif'
-
-def test_tiff(h, f):
-    """TIFF data"""
-    if h[:2] in (b'MM', b'II'):
-        return 'tiff'
-
-def test_rgb(h, f):
-    """SGI image library"""
-    if h.startswith(b'\001\332'):
-        return 'rgb'
-
-def test_pbm(h, f):
-    """PBM (portable bitmap)"""
-    if len(h) >= 3 and h[0] == ord(b'P') and h[1] in b'14':
-        return 'pbm'
-
-def test_pgm(h, f):
-    """PGM (portable graymap)"""
-    if len(h) >= 3 and h[0] == ord(b'P') and h[1] in b'25':
-        return 'pgm'
-
-def test_ppm(h, f):
-    """PPM (portable pixmap)"""
-    if len(h) >= 3 and h[0] == ord(b'P') and h[1] in b'36':
-        return 'ppm'
-
-def test_rast(h, f):
-    """Sun raster file"""
-    if h.startswith(b'\x59\xA6\x6A\x95'):
-        return 'rast'
-
-def test_xbm(h, f):
-    """X bitmap"""
-    if h.startswith(b'#define '):
-        return 'xbm'
-
-def test_bmp(h, f):
-    """BMP data"""
-    if h.startswith(b'BM'):
-        return 'bmp'
-
-def test_webp(h, f):
-    """WebP data"""
-    if h.startswith(b'RIFF') and h[8:12] == b'WEBP':
+def _pnm(kind, digits):
+    """PBM/PGM/PPM: 'P', format digit, whitespace"""
+    def check(h):
+        if len(h) >= 3 and h[1] in digits and h[2] in b' \t\n\r':
+            return kind
+    return check
+
+def _riff(h):
+    """RIFF container, WebP only"""
+    if h[8:12] == b'WEBP':
         return 'webp'
 
-# Add all tests
-for f in [test_jpeg, test_png, test_gif, test_tiff, test_rgb, test_pbm,
-          test_pgm, test_ppm, test_rast, test_xbm, test_bmp, test_webp]:
-    tests.append(f)
+FTYP_BRANDS = {
+    b'avif': 'avif', b'avis': 'avif',
+    b'heic': 'heic', b'heix': 'heic', b'hevc': 'heic', b'hevx': 'heic',
+    b'mif1': 'heic', b'msf1': 'heic',
+}
+
+def _ftyp(h):
+    """ISO BMFF ftyp box: major brand at 8, compatible brands from 16"""
+    if h[4:8] != b'ftyp':
+        return None
+    kind = FTYP_BRANDS.get(h[8:12])
+    if kind == 'heic':
+        # mif1/msf1 — общий HEIF; AVIF узнаётся по совместимым брендам
+        size = min(int.from_bytes(h[:4], 'big'), len(h))
+        for i in range(16, size - 3, 4):
+            if FTYP_BRANDS.get(h[i:i + 4]) == 'avif':
+                return 'avif'
+    return kind
+
+# (prefix, result): result is a type name or a check(h) for the rest of the header
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'MM\x00*', 'tiff'),
+    (b'II*\x00', 'tiff'),
+    (b'\x01\xda', 'rgb'),
+    (b'P1', _pnm('pbm', b'14')),
+    (b'P4', _pnm('pbm', b'14')),
+    (b'P2', _pnm('pgm', b'25')),
+    (b'P5', _pnm('pgm', b'25')),
+    (b'P3', _pnm('ppm', b'36')),
+    (b'P6', _pnm('ppm', b'36')),
+    (b'\x59\xa6\x6a\x95', 'rast'),
+    (b'#define ', 'xbm'),
+    (b'BM', 'bmp'),
+    (b'RIFF', _riff),
+]
+
+def _build_table(signatures):
+    table = {}
+    for prefix, result in signatures:
+        table.setdefault(prefix[0], []).append((prefix, result))
+    for entries in table.values():
+        entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+    return table
+
+TABLE = _build_table(SIGNATURES)
+
+def match(h):
+    """Type of an image header (bytes), or None"""
+    if not h:
+        return None
+    for prefix, result in TABLE.get(h[0], ()):
+        if h.startswith(prefix):
+            kind = result if isinstance(result, str) else result(h)
+            if kind:
+                return kind
+    # ftyp стоит по смещению 4, первый байт — размер бокса
+    return _ftyp(h) if len(h) >= 12 else None
+
+def _read_header(f):
+    """First bytes of an open binary file, leaving its position untouched"""
+    try:
+        location = f.tell()
+    except (AttributeError, OSError):
+        location = None
+    h = f.read(HEADER_SIZE)
+    if location is not None:
+        f.seek(location)
+    return h
 
 def what(file, h=None):
-    """Guess the type of an image"""
+    """Guess the type of an image.
+
+    file — path, open binary file or bytes-like buffer; h — header bytes,
+    if already read (then file is not touched).
+    """
     if h is None:
-        with open(file, 'rb') as f:
-            h = f.read(32)
-    else:
-        h = h[:32]
-    
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'rb') as f:
+                h = f.read(HEADER_SIZE)
+        elif hasattr(file, 'read'):
+            h = _read_header(file)
+        else:
+            h = file
+    h = bytes(memoryview(h)[:HEADER_SIZE])
+
+    res = match(h)
+    if res:
+        return res
     for tf in tests:
         res = tf(h, None)
         if res:
             return res
-    return None
\ No newline at end of file
+    return None
+
+if __name__ == '__main__':
+    import sys
+    for name in sys.argv[1:]:
+        print(f"{name}: {what(name)}")
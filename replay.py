@@ -0,0 +1,311 @@
+"""Запись и офлайн-воспроизведение полного цикла бота с замерами.
+
+    python replay.py record fixtures/run1
+        Гоняет post_analytical_tweet, post_crypto_term и engage_with_mentions
+        на живых сервисах (ключи из .env, твиты публикуются по-настоящему!)
+        и сохраняет ответы RSS, CoinGecko, X API (с загрузкой медиа) и Gemini.
+
+    python replay.py replay fixtures/run1 [--latency-scale 1] [--baseline bench_baseline.json]
+                                          [--save-baseline] [--tolerance 0.2]
+        Прогоняет те же задачи без сети: ответы берутся из фикстур, задержки
+        имитируются по записанным. Печатает время задач и стадий, выделения
+        памяти и падает с кодом 1, если прогон медленнее базового, если
+        запросу не нашлось точной фикстуры или число записей в X разошлось
+        с записью.
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import tempfile
+import tracemalloc
+from collections import Counter, defaultdict, deque
+from datetime import timedelta
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+JOBS = ["post_analytical_tweet", "post_crypto_term", "engage_with_mentions"]
+STAGES = ["rss_fetch", "gemini_call", "x_api"]
+SEED = 1
+X_HOSTS = {"api.twitter.com", "api.x.com", "upload.twitter.com"}
+
+def load_bot(env):
+    """Импортирует bot.py с отдельной базой состояния, чтобы прогоны не зависели от истории"""
+    state_dir = tempfile.mkdtemp(prefix="bot-replay-")
+    os.environ["STATE_DB"] = os.path.join(state_dir, "state.db")
+    os.environ.update(env)
+    random.seed(SEED)
+    import bot
+    bot.metrics.enabled = True
+    return bot
+
+def request_key(method, url):
+    parsed = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parsed.query)))
+    return f"{method} {parsed.scheme}://{parsed.netloc}{parsed.path}?{query}"
+
+def is_x_write(method, url):
+    return method in ("POST", "PUT", "DELETE") and urlparse(url).netloc in X_HOSTS
+
+def prompt_key(prompt):
+    return hashlib.sha256(" ".join(prompt.split()).encode("utf-8")).hexdigest()
+
+# ======================
+# ЗАПИСЬ
+# ======================
+
+class GeminiRecorder:
+    def __init__(self, model, records):
+        self.model = model
+        self.records = records
+
+    def generate_content(self, prompt):
+        started = time.perf_counter()
+        res = self.model.generate_content(prompt)
+        self.records.append({"key": prompt_key(prompt), "text": res.text, "elapsed": time.perf_counter() - started})
+        return res
+
+def record(fixture_dir):
+    bot = load_bot({})
+    http_records, gemini_records = [], []
+
+    def capture(response, *args, **kwargs):
+        http_records.append({
+            "method": response.request.method,
+            "url": response.url,
+            "status": response.status_code,
+            "headers": dict(response.headers),
+            "body": base64.b64encode(response.content).decode("ascii"),
+            "elapsed": response.elapsed.total_seconds(),
+        })
+
+    bot.get_http().hooks["response"].append(capture)
+    bot.ctx.client.session.hooks["response"].append(capture)
+    bot.ctx.api.session.hooks["response"].append(capture)
+    if bot.gemini.use_gemini:
+        bot.gemini.__dict__["model"] = GeminiRecorder(bot.gemini.model, gemini_records)
+
+    for name in JOBS:
+        print(f"⏺️ {name}")
+        getattr(bot, name)()
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    for filename, records in (("http.jsonl", http_records), ("gemini.jsonl", gemini_records)):
+        with open(os.path.join(fixture_dir, filename), "w", encoding="utf-8") as f:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    print(f"✅ Записано: HTTP {len(http_records)}, Gemini {len(gemini_records)} → {fixture_dir}")
+
+# ======================
+# ВОСПРОИЗВЕДЕНИЕ
+# ======================
+
+def read_jsonl(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def replay_adapter(records, latency_scale):
+    """Транспорт requests, который отвечает из фикстур вместо сети"""
+    import io
+    import requests
+    from requests.adapters import BaseAdapter
+    from requests.structures import CaseInsensitiveDict
+
+    by_url = defaultdict(deque)
+    by_path = defaultdict(deque)
+    for rec in records:
+        by_url[request_key(rec["method"], rec["url"])].append(rec)
+        by_path[(rec["method"], urlparse(rec["url"]).path)].append(rec)
+
+    class ReplayAdapter(BaseAdapter):
+        # misses — запросы без фикстуры, fallbacks — ответ взят по пути без query,
+        # repeats — записанный ответ отдан повторно
+        stats = Counter()
+
+        def send(self, request, **kwargs):
+            if is_x_write(request.method, request.url):
+                self.stats["x_writes"] += 1
+            queue = by_url.get(request_key(request.method, request.url))
+            if not queue:
+                # POST с новыми ID в теле и т.п. — берём следующий ответ того же эндпоинта
+                queue = by_path.get((request.method, urlparse(request.url).path))
+                if queue:
+                    self.stats["fallbacks"] += 1
+                    print(f"⚠️ Фикстура по пути: {request.method} {request.url}")
+            if not queue:
+                self.stats["misses"] += 1
+                print(f"❌ Нет фикстуры: {request.method} {request.url}")
+                raise requests.ConnectionError(f"Нет фикстуры для {request.method} {request.url}")
+            if len(queue) == 1:
+                self.stats["repeats"] += 1
+            rec = queue.popleft() if len(queue) > 1 else queue[0]
+            self.stats["served"] += 1
+            time.sleep(rec["elapsed"] * latency_scale)
+            response = requests.Response()
+            response.status_code = rec["status"]
+            response.headers = CaseInsensitiveDict(rec["headers"])
+            response.headers.pop("Content-Encoding", None)
+            response.raw = io.BytesIO(base64.b64decode(rec["body"]))
+            response.url = request.url
+            response.request = request
+            response.elapsed = timedelta(seconds=rec["elapsed"] * latency_scale)
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            return response
+
+        def close(self):
+            pass
+
+    return ReplayAdapter()
+
+class FakeGeminiResponse:
+    def __init__(self, text):
+        self.text = text
+
+class GeminiReplay:
+    def __init__(self, records, latency_scale):
+        self.by_key = {rec["key"]: rec for rec in records}
+        self.in_order = deque(records)
+        self.latency_scale = latency_scale
+        self.stats = Counter()
+
+    def generate_content(self, prompt):
+        rec = self.by_key.get(prompt_key(prompt))
+        if rec is None:
+            if not self.in_order:
+                self.stats["misses"] += 1
+                raise RuntimeError("Нет фикстуры Gemini")
+            # промпт изменился — отвечаем первой записью, но прогон уже не чистый
+            self.stats["fallbacks"] += 1
+            rec = self.in_order[0]
+        else:
+            self.stats["served"] += 1
+        time.sleep(rec["elapsed"] * self.latency_scale)
+        return FakeGeminiResponse(rec["text"])
+
+def stage_seconds(metrics):
+    totals = defaultdict(float)
+    with metrics.lock:
+        for (name, _), histogram in metrics.histograms.items():
+            if name in STAGES:
+                totals[name] += histogram[-2]
+    return totals
+
+def replay(fixture_dir, latency_scale):
+    http_records = read_jsonl(os.path.join(fixture_dir, "http.jsonl"))
+    gemini_records = read_jsonl(os.path.join(fixture_dir, "gemini.jsonl"))
+    env = {
+        "API_KEY": "replay", "API_SECRET": "replay",
+        "ACCESS_TOKEN": "replay", "ACCESS_TOKEN_SECRET": "replay",
+        "GEMINI_API_KEY": "replay" if gemini_records else "",
+    }
+    bot = load_bot(env)
+    adapter = replay_adapter(http_records, latency_scale)
+    bot.get_http().mount("https://", adapter)
+    bot.get_http().mount("http://", adapter)
+    bot.ctx.client.session.mount("https://", adapter)
+    bot.ctx.api.session.mount("https://", adapter)
+    gemini = GeminiReplay(gemini_records, latency_scale)
+    if gemini_records:
+        bot.gemini.__dict__["model"] = gemini
+
+    results = {}
+    for name in JOBS:
+        before = stage_seconds(bot.metrics)
+        tracemalloc.start()
+        started = time.perf_counter()
+        error = None
+        try:
+            getattr(bot, name)()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        after = stage_seconds(bot.metrics)
+        results[name] = {
+            "seconds": round(seconds, 4),
+            "stages": {stage: round(after[stage] - before[stage], 4) for stage in STAGES if after[stage] - before[stage]},
+            "allocated_bytes": current,
+            "peak_bytes": peak,
+            "error": error,
+        }
+    fidelity = {
+        "http": dict(adapter.stats),
+        "gemini": dict(gemini.stats),
+        "x_writes": adapter.stats["x_writes"],
+        "x_writes_recorded": sum(is_x_write(rec["method"], rec["url"]) for rec in http_records),
+    }
+    return results, fidelity
+
+def fidelity_problems(fidelity):
+    """Расхождения с записью; при них замер ничего не говорит о скорости"""
+    problems = []
+    for source in ("http", "gemini"):
+        for kind in ("misses", "fallbacks"):
+            if fidelity[source].get(kind):
+                problems.append(f"{source} {kind}: {fidelity[source][kind]}")
+    if fidelity["x_writes"] != fidelity["x_writes_recorded"]:
+        problems.append(f"X writes: {fidelity['x_writes']}, в записи {fidelity['x_writes_recorded']}")
+    return problems
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно базового прогона"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for field in ("seconds", "peak_bytes"):
+            if base[field] and result[field] > base[field] * (1 + tolerance):
+                regressions.append(f"{name}.{field}: {result[field]} > {base[field]} (+{tolerance:.0%})")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Запись и офлайн-замер цикла публикации")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("fixtures")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="множитель записанных задержек, 0 — без задержек")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.mode == "record":
+        record(args.fixtures)
+        return 0
+
+    results, fidelity = replay(args.fixtures, args.latency_scale)
+    for name, result in results.items():
+        stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in result["stages"].items())
+        print(f"⏱️ {name}: {result['seconds']:.3f}s, peak {result['peak_bytes'] / 1024:.0f} KiB [{stages}]")
+        if result["error"]:
+            print(f"   ❌ {result['error']}")
+    print(f"📼 HTTP {fidelity['http']}, Gemini {fidelity['gemini']}")
+    problems = fidelity_problems(fidelity)
+    problems += [f"{name}: {result['error']}" for name, result in results.items() if result["error"]]
+    if problems:
+        print("❌ Прогон не совпал с записью:\n" + "\n".join(f"   {line}" for line in problems))
+        return 1
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 Базовый прогон сохранён в {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Регрессия:\n" + "\n".join(f"   {line}" for line in regressions))
+            return 1
+        print("✅ В пределах базового прогона")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# bot.py открывает базу состояния лениво, но путь читает при импорте
+os.environ["STATE_DB"] = os.path.join(tempfile.mkdtemp(prefix="bot-tests-"), "state.db")
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+import bot
+
+class EchoModel:
+    """Отвечает самим промптом, чтобы было видно, что в него попало"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return type("Response", (), {"text": prompt})()
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot, "ctx", bot.BotContext(env={}))
+    monkeypatch.setattr(bot, "accounts", {})
+    model = EchoModel()
+    gemini = bot.GeminiContext(env={"GEMINI_API_KEY": "test"})
+    gemini.__dict__["llm"] = bot.LLMCache(model, "fake", path=str(tmp_path / "llm.db"))
+    monkeypatch.setattr(bot, "gemini", gemini)
+    return tmp_path, model
+
+def write_accounts(tmp_path, config):
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return str(path)
+
+def test_accounts_with_personas_get_different_analyses(isolated):
+    tmp_path, model = isolated
+    accounts = bot.load_accounts(write_accounts(tmp_path, [
+        {"name": "main"},
+        {"name": "en", "env_prefix": "EN_", "language": "English", "persona": "Concise macro trader"},
+    ]))
+    texts = [bot.generate_long_analysis("Bitcoin ETF inflows", "https://x.example", "", account)
+             for account in accounts.values()]
+    assert texts[0] != texts[1]
+    assert len(model.prompts) == 2
+    assert "Concise macro trader" in texts[1] and "English" in texts[1]
+    assert accounts["main"] is bot.ctx
+
+def test_same_voice_on_two_posting_accounts_is_rejected(isolated):
+    tmp_path, _ = isolated
+    with pytest.raises(ValueError):
+        bot.load_accounts(write_accounts(tmp_path, [
+            {"name": "main"},
+            {"name": "copy", "env_prefix": "COPY_"},
+        ]))
+
+def test_reply_only_account_may_share_voice(isolated):
+    tmp_path, _ = isolated
+    accounts = bot.load_accounts(write_accounts(tmp_path, [
+        {"name": "main"},
+        {"name": "support", "env_prefix": "SUP_", "jobs": {"analysis": False, "terms": False}},
+    ]))
+    assert list(accounts) == ["main", "support"]
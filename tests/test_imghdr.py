@@ -0,0 +1,124 @@
+import io
+
+import pytest
+
+import bot
+import imghdr
+from conftest import ROOT
+
+def test_local_module_is_used():
+    assert imghdr.__file__.startswith(ROOT)
+
+@pytest.mark.parametrize("header, kind", [
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF\x00", "jpeg"),
+    (b"\xff\xd8\xff\xe1\x00\x10Exif\x00", "jpeg"),
+    # без маркеров JFIF/Exif (DQT сразу после SOI)
+    (b"\xff\xd8\xff\xdb\x00\x43\x00", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n\x00\x00", "png"),
+    (b"GIF87a\x01\x00", "gif"),
+    (b"GIF89a\x01\x00", "gif"),
+    (b"MM\x00*\x00\x00\x00\x08", "tiff"),
+    (b"II*\x00\x08\x00\x00\x00", "tiff"),
+    (b"\x01\xda\x01\x01", "rgb"),
+    (b"P1 1 1\n1", "pbm"), (b"P4\n1 1\n", "pbm"),
+    (b"P2\t1 1", "pgm"), (b"P5\r\n1 1", "pgm"),
+    (b"P3 1 1", "ppm"), (b"P6\n1 1", "ppm"),
+    (b"\x59\xa6\x6a\x95\x00", "rast"),
+    (b"#define w 1\n", "xbm"),
+    (b"BM\x36\x00\x00\x00", "bmp"),
+    (b"RIFF\x24\x00\x00\x00WEBPVP8 ", "webp"),
+    (b"\x00\x00\x00\x1cftypavif\x00\x00\x00\x00avifmif1miaf", "avif"),
+    (b"\x00\x00\x00\x1cftypavis\x00\x00\x00\x00avismif1msf1", "avif"),
+    (b"\x00\x00\x00\x18ftypheic\x00\x00\x00\x00mif1heic", "heic"),
+    (b"\x00\x00\x00\x18ftypheix\x00\x00\x00\x00mif1heix", "heic"),
+    (b"\x00\x00\x00\x18ftyphevc\x00\x00\x00\x00msf1hevc", "heic"),
+    # общий HEIF-бренд: AVIF по совместимому бренду, иначе HEIC
+    (b"\x00\x00\x00\x1cftypmif1\x00\x00\x00\x00mif1avifmiaf", "avif"),
+    (b"\x00\x00\x00\x18ftypmif1\x00\x00\x00\x00mif1heic", "heic"),
+])
+def test_formats(header, kind):
+    assert imghdr.what(None, header) == kind
+
+@pytest.mark.parametrize("header", [
+    b"MM\x00\x00 not tiff",         # раньше хватало "MM"/"II"
+    b"II\x00* not tiff",
+    b"MMXX",
+    b"P7 1 1",
+    b"P1x1",                        # после цифры нужен пробельный символ
+    b"P6",
+    b"RIFF\x24\x00\x00\x00WAVEfmt ",
+    b"\x00\x00\x00\x18ftypisom\x00\x00\x00\x00isomiso2",   # MP4, не картинка
+    b"\x00\x00\x00\x18ftypmp42",
+    b"\xff\xd8\x00\x00",
+    b"",
+    bytes(32),
+])
+def test_not_images(header):
+    assert imghdr.what(None, header) is None
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(40)
+
+@pytest.mark.parametrize("make", [bytes, bytearray, memoryview, lambda data: memoryview(data)[:32]])
+def test_buffer_inputs(make):
+    assert imghdr.what(make(PNG)) == "png"
+    assert imghdr.what(None, make(PNG)) == "png"
+
+def test_file_object_position_is_restored():
+    f = io.BytesIO(b"junk" + PNG)
+    f.seek(4)
+    assert imghdr.what(f) == "png"
+    assert f.tell() == 4
+
+def test_path_and_header_argument(tmp_path):
+    path = tmp_path / "image.bin"
+    path.write_bytes(PNG)
+    assert imghdr.what(str(path)) == "png"
+    assert imghdr.what(path) == "png"
+    # заголовок уже прочитан (так зовёт tweepy) — файл не открывается
+    assert imghdr.what(str(tmp_path / "missing"), h=b"GIF89a") == "gif"
+
+def test_extra_tests_are_consulted(monkeypatch):
+    monkeypatch.setattr(imghdr, "tests", [lambda h, f: "custom" if h.startswith(b"CUST") else None])
+    assert imghdr.what(None, b"CUSTOM") == "custom"
+
+# ======================
+# check_media / render_chart
+# ======================
+
+def test_rendered_chart_is_valid_png():
+    png = bot.render_chart([100, 101, 99, 103, 102])
+    assert bot.check_media(png) == ("png", len(png))
+
+def test_check_media_streams_file_and_restores_position():
+    png = bot.render_chart([1, 2, 3])
+    f = io.BytesIO(png)
+    assert bot.check_media(f) == ("png", len(png))
+    assert f.tell() == 0
+
+def test_check_media_rejects_oversized_file():
+    f = io.BytesIO(PNG + bytes(2 * bot.MEDIA_CHUNK))
+    with pytest.raises(ValueError):
+        bot.check_media(f, limit=bot.MEDIA_CHUNK)
+    assert f.tell() == 0
+
+def test_check_media_rejects_oversized_buffer():
+    with pytest.raises(ValueError):
+        bot.check_media(PNG + bytes(100), limit=64)
+
+@pytest.mark.parametrize("data", [b"II*\x00" + bytes(40), b"not an image at all", b"BM" + bytes(40)])
+def test_check_media_rejects_unsupported_types(data):
+    with pytest.raises(ValueError):
+        bot.check_media(data)
+
+def test_upload_media_passes_file_to_api():
+    calls = []
+
+    class Api:
+        def media_upload(self, filename, file):
+            calls.append((filename, imghdr.what(filename, h=file.read(32))))
+            return type("Media", (), {"media_id_string": "42"})()
+
+    account = bot.BotContext(env={})
+    account.__dict__["api"] = Api()
+    assert bot.upload_media(account, bot.render_chart([1, 2])) == "42"
+    assert calls == [("chart.png", "png")]
@@ -0,0 +1,31 @@
+import os
+import re
+import subprocess
+import sys
+
+from conftest import ROOT
+
+IMPORT_BUDGET_US = 300_000      # импорт bot вместе с зависимостями, микросекунды
+HEAVY_MODULES = ("tweepy", "google.generativeai")
+
+def import_bot(tmp_path):
+    env = dict(os.environ, STATE_DB=str(tmp_path / "state.db"))
+    code = "import sys, bot; print(','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=60, check=True,
+    )
+
+def cumulative_us(stderr, module):
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)$", line)
+        if match and match.group(3) == module and not match.group(2):
+            return int(match.group(1))
+    raise AssertionError(f"{module} нет в выводе -X importtime")
+
+def test_import_is_fast_and_lazy(tmp_path):
+    result = import_bot(tmp_path)
+    assert result.stdout.strip() == "", f"тяжёлые модули импортированы сразу: {result.stdout.strip()}"
+    assert cumulative_us(result.stderr, "bot") < IMPORT_BUDGET_US
+    # импорт не создаёт базу и не ходит в сеть
+    assert not (tmp_path / "state.db").exists()
@@ -0,0 +1,132 @@
+import time
+from threading import Event, Thread
+
+import pytest
+
+import bot
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Модель-заглушка: считает вызовы, может ждать сигнала или падать"""
+
+    def __init__(self, release=None, error=None):
+        self.calls = []
+        self.release = release
+        self.error = error
+
+    def generate_content(self, prompt):
+        self.calls.append(prompt)
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return FakeResponse(f"answer to {prompt}")
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(bot.time, "time", lambda: now[0])
+    return now
+
+def make_cache(tmp_path, model, **kwargs):
+    return bot.LLMCache(model, "fake", path=str(tmp_path / "llm.db"), **kwargs)
+
+def test_hit_and_miss(tmp_path):
+    model = FakeModel()
+    cache = make_cache(tmp_path, model)
+    assert cache.generate("q") == "answer to q"
+    # пробелы нормализуются, повтор берётся из кэша
+    assert cache.generate("  q ") == "answer to q"
+    assert model.calls == ["q"]
+    stats = cache.summary()
+    assert (stats["hits"], stats["misses"], stats["calls"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+def test_cache_survives_restart(tmp_path):
+    make_cache(tmp_path, FakeModel()).generate("q")
+    model = FakeModel()
+    assert make_cache(tmp_path, model).generate("q") == "answer to q"
+    assert model.calls == []
+
+def test_ttl_expiry(tmp_path, clock):
+    model = FakeModel()
+    cache = make_cache(tmp_path, model, ttl=60)
+    cache.generate("q")
+    clock[0] += 59
+    cache.generate("q")
+    assert len(model.calls) == 1
+    clock[0] += 2
+    cache.generate("q")
+    assert len(model.calls) == 2
+
+def test_lru_trimming(tmp_path, clock):
+    model = FakeModel()
+    cache = make_cache(tmp_path, model, max_entries=2)
+    cache.generate("a")
+    clock[0] += 1
+    cache.generate("b")
+    clock[0] += 1
+    cache.generate("a")         # a свежее b
+    clock[0] += 1
+    cache.generate("c")         # вытесняет b
+    assert cache.db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 2
+    cache.generate("a")
+    cache.generate("c")
+    assert model.calls == ["a", "b", "c"]
+    cache.generate("b")
+    assert model.calls == ["a", "b", "c", "b"]
+
+def run_concurrently(cache, prompt, count):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(cache.generate(prompt))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+def wait_inflight(cache, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while cache.summary()["coalesced"] < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+def test_concurrent_callers_coalesce(tmp_path):
+    release = Event()
+    model = FakeModel(release=release)
+    cache = make_cache(tmp_path, model)
+    threads, results, errors = run_concurrently(cache, "q", 5)
+    wait_inflight(cache, 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert results == ["answer to q"] * 5
+    assert model.calls == ["q"]
+    assert cache.summary()["coalesced"] == 4
+
+def test_error_fans_out_to_waiters(tmp_path):
+    release = Event()
+    model = FakeModel(release=release, error=RuntimeError("quota"))
+    cache = make_cache(tmp_path, model)
+    threads, results, errors = run_concurrently(cache, "q", 4)
+    wait_inflight(cache, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == []
+    assert len(errors) == 4 and all(str(e) == "quota" for e in errors)
+    assert model.calls == ["q"]
+    assert cache.summary()["errors"] == 1
+    # ошибка не кэшируется — следующий вызов снова идёт в модель
+    model.error = None
+    model.release = None
+    assert cache.generate("q") == "answer to q"
+    assert len(model.calls) == 2
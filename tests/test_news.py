@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import bot
+from conftest import ROOT
+
+NOW = 1_700_000_000
+
+def item(title, link, published=NOW - 600, description=""):
+    return {"title": title, "link": link, "description": description, "published": published}
+
+def titles(stories):
+    return sorted(sorted(story["links"]) for story in stories)
+
+def test_same_story_from_two_feeds_is_merged():
+    stories = bot.aggregate_news({
+        "a": [item("Bitcoin surges past $70K as ETF inflows grow", "a/1")],
+        "b": [item("Bitcoin surged past $70K as ETF inflows grow", "b/1", description="longer text")],
+    }, now=NOW)
+    assert len(stories) == 1
+    assert sorted(stories[0]["links"]) == ["a/1", "b/1"]
+    assert stories[0]["sources"] == {"a", "b"}
+    assert stories[0]["description"] == "longer text"
+
+def test_opposite_headlines_are_not_merged():
+    stories = bot.aggregate_news({
+        "a": [item("Bitcoin price drops below 60K", "a/1")],
+        "b": [item("Bitcoin price rises above 60K", "b/1")],
+    }, now=NOW)
+    assert titles(stories) == [["a/1"], ["b/1"]]
+
+def test_different_assets_are_not_merged():
+    stories = bot.aggregate_news({
+        "a": [item("Bitcoin ETF inflows hit record high", "a/1")],
+        "b": [item("Ethereum ETF inflows hit record high", "b/1")],
+    }, now=NOW)
+    assert titles(stories) == [["a/1"], ["b/1"]]
+
+@pytest.mark.parametrize("first, second", [
+    ("SEC approves spot Solana ETF applications from major issuers",
+     "SEC rejects spot Solana ETF applications from major issuers"),
+    ("Bitcoin ETF inflows surge after SEC approval of new fund",
+     "Bitcoin ETF outflows surge after SEC approval of new fund"),
+    ("SEC approves spot Solana ETF applications from major issuers",
+     "SEC does not approve spot Solana ETF applications from major issuers"),
+])
+def test_long_headlines_with_opposite_tone_are_not_merged(first, second):
+    # одно слово из многих: по парам слов сходство выше порога
+    assert bot.jaccard(bot.headline_shingles(first), bot.headline_shingles(second)) >= bot.DUPLICATE_THRESHOLD
+    stories = bot.aggregate_news({"a": [item(first, "a/1")], "b": [item(second, "b/1")]}, now=NOW)
+    assert titles(stories) == [["a/1"], ["b/1"]]
+
+def test_ranking_by_sources_and_recency():
+    stories = bot.aggregate_news({
+        "a": [item("Solana network halts block production", "a/1", published=NOW - 3600),
+              item("SEC delays decision on spot ether ETF", "a/2", published=NOW - 60)],
+        "b": [item("Solana network halts block production again", "b/1", published=NOW - 3000)],
+    }, now=NOW)
+    assert stories[0]["links"] == ["b/1", "a/1"]
+    assert stories[0]["score"] > stories[1]["score"]
+
+def test_signature_is_stable_across_processes():
+    code = "import bot; print(bot.minhash(bot.headline_shingles('Bitcoin price drops below 60K')))"
+    outputs = set()
+    for seed in ("1", "2"):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True)
+        outputs.add(result.stdout)
+    assert len(outputs) == 1
+    assert outputs.pop().strip() == str(bot.minhash(bot.headline_shingles("Bitcoin price drops below 60K")))
@@ -0,0 +1,98 @@
+import pytest
+
+import bot
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = type("Response", (), {"status_code": status})()
+
+class Tweet:
+    def __init__(self, tweet_id):
+        self.data = {"id": tweet_id}
+
+class FakeClient:
+    """create_tweet по очереди отдаёт статусы из errors (None — успех), затем успех"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def create_tweet(self, text, in_reply_to_tweet_id=None, media_ids=None):
+        status = self.errors.pop(0) if self.errors else None
+        if status:
+            raise HTTPError(status)
+        self.sent.append((text, in_reply_to_tweet_id, media_ids))
+        return Tweet(100 + len(self.sent))
+
+@pytest.fixture
+def account(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot.time, "sleep", lambda seconds: None)
+    account = bot.BotContext(env={})
+    account.__dict__["client"] = FakeClient()
+    outbox = bot.Outbox(lambda name: account, path=str(tmp_path / "outbox.db"))
+    monkeypatch.setattr(bot, "accounts", {account.name: account})
+    return account, outbox
+
+def attempts(outbox):
+    return [row[0] for row in outbox.db.execute("SELECT attempts FROM outbox ORDER BY seq")]
+
+def test_thread_is_chained_with_media_on_first_tweet(account):
+    account, outbox = account
+    assert outbox.publish(account, ["a", "b"], media_ids=["7"]) == ["101", "102"]
+    assert account.client.sent == [("a", None, ["7"]), ("b", "101", None)]
+    # повтор с теми же частями не создаёт дублей
+    assert outbox.publish(account, ["a", "b"]) == ["101", "102"]
+    assert len(account.client.sent) == 2
+
+@pytest.mark.parametrize("status", [400, 403, 404, 422])
+def test_client_errors_are_not_retried(account, status):
+    account, outbox = account
+    account.client.errors = [status]
+    with pytest.raises(HTTPError):
+        outbox.publish(account, ["a"])
+    assert attempts(outbox) == [bot.OUTBOX_MAX_ATTEMPTS]
+    assert outbox.pending() == []
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_transient_errors_are_retried(account, status):
+    account, outbox = account
+    account.client.errors = [status]
+    assert outbox.publish(account, ["a"]) == ["101"]
+    assert attempts(outbox) == [2]
+
+def test_resume_finishes_interrupted_thread(account):
+    account, outbox = account
+    account.client.errors = [500] * bot.OUTBOX_RETRIES
+    with pytest.raises(HTTPError):
+        outbox.publish(account, ["a", "b"])
+    assert len(outbox.pending()) == 1
+    outbox.resume()
+    assert outbox.pending() == []
+    assert [text for text, _, _ in account.client.sent] == ["a", "b"]
+
+def test_story_resumed_after_failure_is_not_picked_again(account, monkeypatch):
+    account, outbox = account
+    monkeypatch.setattr(bot, "outbox", outbox)
+    monkeypatch.setattr(bot, "CHART_IMAGES", False)
+    monkeypatch.setattr(bot.price_service, "summary", lambda: "BTC: $1")
+    posted = {"title": "Bitcoin miners capitulate as hashprice sinks", "link": "https://news.example/resume/1",
+              "description": "", "published": bot.time.time()}
+    other = {"title": "Stablecoin supply climbs to new high", "link": "https://news.example/resume/2",
+             "description": "", "published": bot.time.time() - 3600}
+    monkeypatch.setattr(bot, "shared_news", {"results": {"feed": [posted, other]}, "fetched": bot.time.time()})
+
+    story = bot.get_latest_crypto_news(account)
+    assert story["link"] == posted["link"]
+    # первый твит ушёл, второй упал — пост оборван
+    account.client.errors = [None] + [503] * bot.OUTBOX_RETRIES
+    with pytest.raises(HTTPError):
+        bot.publish_analysis(story, "analysis " * 80, account)
+    assert len(outbox.pending()) == 1
+    # ссылки отмечены уже с первым твитом
+    assert bot.get_latest_crypto_news(account)["link"] == other["link"]
+
+    outbox.resume()
+    assert outbox.pending() == []
+    assert len(account.client.sent) > 2
+    assert bot.get_latest_crypto_news(account)["link"] == other["link"]
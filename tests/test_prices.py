@@ -0,0 +1,109 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+import bot
+
+class CoinGecko:
+    """Локальная подмена CoinGecko и BingX: отдаёт заданную цену или ошибку"""
+
+    def __init__(self):
+        self.price = 50000
+        self.status = 200
+        self.bingx_price = "50010.5"
+        self.requests = 0
+
+@pytest.fixture
+def coingecko():
+    state = CoinGecko()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/openApi/spot/v1/ticker/24hr"):
+                body = json.dumps({"data": [{"symbol": "BTC-USDT", "lastPrice": state.bingx_price}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+            elif not self.path.startswith("/simple/price"):
+                body = b"{}"
+                self.send_response(404)
+            elif state.status == 200:
+                state.requests += 1
+                body = json.dumps({"bitcoin": {"usd": state.price, "usd_24h_change": 1.0}}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+            else:
+                state.requests += 1
+                body = b"{}"
+                self.send_response(state.status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+def make_service(coingecko, use_bingx=False):
+    return bot.PriceService({"bitcoin": "BTC"}, coingecko_url=coingecko.url, bingx_url=coingecko.url,
+                            use_bingx=use_bingx, ttl=60, max_stale=900)
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_fetch_and_cache(coingecko):
+    service = make_service(coingecko)
+    assert service.summary() == "BTC: $50,000 (+1.0%)"
+    service.get()
+    assert coingecko.requests == 1
+
+def test_stale_quotes_served_while_refreshing(coingecko):
+    service = make_service(coingecko)
+    service.get()
+    service.updated -= 120
+    coingecko.price = 51000
+    assert service.get()["BTC"]["usd"] == 50000
+    wait_for(lambda: service.quotes["BTC"]["usd"] == 51000)
+    assert service.get()["BTC"]["usd"] == 51000
+
+def test_quotes_past_max_stale_are_hidden(coingecko):
+    service = make_service(coingecko)
+    service.get()
+    service.updated -= 10 * 3600
+    coingecko.status = 500
+    assert service.get() == {}
+    assert service.summary() == "Prices unavailable"
+
+def test_expired_quotes_refreshed_synchronously(coingecko):
+    service = make_service(coingecko)
+    service.get()
+    service.updated -= 10 * 3600
+    coingecko.price = 52000
+    assert service.get()["BTC"]["usd"] == 52000
+
+def test_bingx_prices_are_shown(coingecko):
+    service = make_service(coingecko, use_bingx=True)
+    assert service.summary() == "BTC: $50,000 (+1.0%), BingX $50,010.5"
+
+def test_bingx_is_fallback_when_coingecko_fails(coingecko):
+    coingecko.status = 500
+    service = make_service(coingecko, use_bingx=True)
+    assert service.summary() == "BTC: $50,010.5 (BingX)"
+
+def test_warm_refreshes_in_background(coingecko):
+    service = make_service(coingecko)
+    service.warm()
+    wait_for(lambda: service.quotes)
+    assert service.quotes["BTC"]["usd"] == 50000
+    service.warm()              # свежие цены повторно не запрашиваются
+    assert coingecko.requests == 1
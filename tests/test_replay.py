@@ -0,0 +1,49 @@
+import base64
+
+import pytest
+import requests
+
+import replay
+
+def record(method, url, body=b"{}"):
+    return {
+        "method": method, "url": url, "status": 200, "headers": {"Content-Type": "application/json"},
+        "body": base64.b64encode(body).decode("ascii"), "elapsed": 0.0,
+    }
+
+@pytest.fixture
+def session():
+    records = [
+        record("GET", "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin"),
+        record("POST", "https://api.twitter.com/2/tweets", b'{"data": {"id": "1"}}'),
+    ]
+    adapter = replay.replay_adapter(records, latency_scale=0)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.adapter = adapter
+    return session
+
+def test_exact_match(session):
+    assert session.get("https://api.coingecko.com/api/v3/simple/price?ids=bitcoin").json() == {}
+    assert session.post("https://api.twitter.com/2/tweets", json={"text": "x"}).json()["data"]["id"] == "1"
+    stats = session.adapter.stats
+    assert (stats["served"], stats["misses"], stats["fallbacks"], stats["x_writes"]) == (2, 0, 0, 1)
+
+def test_misses_and_fallbacks_are_counted(session):
+    session.get("https://api.coingecko.com/api/v3/simple/price?ids=ethereum")
+    with pytest.raises(requests.ConnectionError):
+        session.get("https://example.com/rss")
+    stats = session.adapter.stats
+    assert (stats["fallbacks"], stats["misses"]) == (1, 1)
+
+def test_fidelity_problems():
+    clean = {"http": {"served": 3}, "gemini": {"served": 1}, "x_writes": 2, "x_writes_recorded": 2}
+    assert replay.fidelity_problems(clean) == []
+    broken = {"http": {"misses": 1}, "gemini": {"fallbacks": 2}, "x_writes": 1, "x_writes_recorded": 2}
+    assert len(replay.fidelity_problems(broken)) == 3
+
+def test_gemini_fallback_is_counted():
+    model = replay.GeminiReplay([{"key": replay.prompt_key("known"), "text": "ok", "elapsed": 0}], 0)
+    assert model.generate_content("known").text == "ok"
+    assert model.generate_content("changed prompt").text == "ok"
+    assert model.stats == {"served": 1, "fallbacks": 1}
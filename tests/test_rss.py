@@ -0,0 +1,65 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+import bot
+
+FEED = b"""<?xml version="1.0"?><rss version="2.0"><channel>
+<item><title>Third</title><link>https://news.example/3</link></item>
+<item><title>Second</title><link>https://news.example/2</link></item>
+<item><title>First</title><link>https://news.example/1</link></item>
+</channel></rss>"""
+
+@pytest.fixture
+def feed_server():
+    validators = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            validators.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(FEED)))
+            self.end_headers()
+            self.wfile.write(FEED)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/rss", validators
+    server.shutdown()
+    server.server_close()
+
+def links(items):
+    return [item["link"] for item in items]
+
+def test_items_are_parsed(feed_server):
+    url, _ = feed_server
+    assert links(bot.parse_rss_feed(url)) == [f"https://news.example/{i}" for i in (3, 2, 1)]
+
+def test_seen_cutoff_keeps_conditional_get(feed_server):
+    url, validators = feed_server
+    seen = {"https://news.example/2"}.__contains__
+    for _ in range(3):
+        assert links(bot.parse_rss_feed(url, seen=seen)) == ["https://news.example/3"]
+    assert validators == [None, '"v1"', '"v1"']
+
+def test_cached_prefix_respects_newly_seen_links(feed_server):
+    url, validators = feed_server
+    assert len(bot.parse_rss_feed(url, seen={"https://news.example/1"}.__contains__)) == 2
+    assert bot.parse_rss_feed(url, seen={"https://news.example/3"}.__contains__) == []
+    assert validators == [None, '"v1"']
+
+def test_limit_cutoff_refetches_when_more_items_needed(feed_server):
+    url, validators = feed_server
+    assert len(bot.parse_rss_feed(url, limit=1)) == 1
+    assert len(bot.parse_rss_feed(url, limit=1)) == 1
+    assert len(bot.parse_rss_feed(url, limit=3)) == 3
+    assert validators == [None, '"v1"', None]
@@ -0,0 +1,40 @@
+import pytest
+
+import bot
+
+@pytest.mark.parametrize("token", [
+    "bank", "banking", "banks", "hackathon", "athens", "athlete", "bearer", "bearing",
+    "bullet", "suede", "rugby", "fellow",
+])
+def test_short_stems_do_not_match_other_words(token):
+    assert bot.token_weight(token) == 0
+
+@pytest.mark.parametrize("token, sign", [
+    ("ban", -1), ("banned", -1), ("hack", -1), ("hacked", -1), ("sued", -1), ("rug-pull", -1),
+    ("bearish", -1), ("fell", -1), ("bullish", 1), ("ath", 1), ("bankrupt", -1),
+    ("surging", 1), ("rallies", 1), ("liquidations", -1), ("обвал", -1), ("ралли", 1),
+])
+def test_sentiment_words(token, sign):
+    assert bot.token_weight(token) * sign > 0
+
+def test_bank_headlines_are_neutral():
+    [(score, assets)] = bot.score_texts(["Central bank and Bank of America discuss Bitcoin custody"])
+    assert score == 0.0
+    assert assets == {"BTC"}
+
+def test_negation_flips_nearest_word():
+    [(plain, _), (negated, _)] = bot.score_texts([
+        "Bitcoin ETF approved", "Bitcoin ETF not approved",
+    ])
+    assert plain > 0 > negated
+
+def test_tracker_aggregates_per_asset():
+    tracker = bot.SentimentTracker(window=3)
+    tracker.observe(["Bitcoin surges", "Ethereum crash", "Bitcoin rally", "Bitcoin soars", "Bitcoin jumps"])
+    score, count = tracker.aggregate("BTC")
+    assert count == 3 and score > 0
+    assert tracker.aggregate("ETH") == (-1.0, 1)
+    # повтор по тому же ключу не учитывается
+    tracker.observe(["Ethereum crash"], keys=["x"])
+    tracker.observe(["Ethereum crash"], keys=["x"])
+    assert tracker.aggregate("ETH")[1] == 2
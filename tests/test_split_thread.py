@@ -0,0 +1,64 @@
+import random
+import re
+
+import pytest
+
+import bot
+
+# Словарь для случайных текстов: латиница, кириллица, CJK, эмодзи (в т.ч. ZWJ), ссылки
+WORDS = [
+    "bitcoin", "ETF", "рынок", "ликвидность", "halving", "比特币", "市场", "🚀", "📉",
+    "👩‍💻", "👍🏽", "https://example.com/some/very/long/path?with=query&and=more",
+    "BTC/USDT", "—", "2024", "on-chain", "накопление", "volatility",
+]
+ENDINGS = ["", "", "", ".", "!", "?", "…", ",", "\n"]
+NUMBERING = re.compile(r" (\d+)/(\d+)$")
+
+def random_text(rng, words):
+    return " ".join(rng.choice(WORDS) + rng.choice(ENDINGS) for _ in range(words))
+
+def strip_numbering(parts):
+    bodies, numbers = [], []
+    for part in parts:
+        match = NUMBERING.search(part)
+        assert match, part
+        bodies.append(part[:match.start()])
+        numbers.append((int(match.group(1)), int(match.group(2))))
+    return bodies, numbers
+
+@pytest.mark.parametrize("seed", range(300))
+def test_split_properties(seed):
+    rng = random.Random(seed)
+    text = random_text(rng, rng.randint(1, 400))
+    limit = rng.choice([bot.TWEET_LIMIT, bot.TWEET_LIMIT, 140, 60])
+    parts = bot.split_thread(text, limit)
+
+    assert all(bot.tweet_length(part) <= limit for part in parts)
+    if bot.tweet_length(text.strip()) <= limit:
+        assert parts == [text.strip()]
+        return
+    bodies, numbers = strip_numbering(parts)
+    # нумерация 1/N … N/N
+    assert numbers == [(i, len(parts)) for i in range(1, len(parts) + 1)]
+    # ни одно слово не потеряно и не разрезано
+    assert " ".join(bodies).split() == text.split()
+
+def test_short_text_is_not_numbered():
+    assert bot.split_thread("  Bitcoin up 5%.  ") == ["Bitcoin up 5%."]
+
+def test_prefers_sentence_boundary():
+    text = ("First sentence is here. " * 8) + ("word " * 60)
+    parts = bot.split_thread(text)
+    assert parts[0].endswith(". 1/%d" % len(parts))
+
+def test_weighted_length():
+    assert bot.tweet_length("abc") == 3
+    assert bot.tweet_length("比特币") == 6
+    assert bot.tweet_length("👩‍💻") == 2
+    assert bot.tweet_length("see https://example.com/" + "x" * 100) == 4 + bot.URL_WEIGHT
+
+def test_unbreakable_word_is_cut():
+    parts = bot.split_thread("x" * 700)
+    assert all(bot.tweet_length(part) <= bot.TWEET_LIMIT for part in parts)
+    bodies, _ = strip_numbering(parts)
+    assert "".join(bodies) == "x" * 700